@@ -0,0 +1,450 @@
+import heapq
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the array-module code paths are used instead
+    np = None
+
+# Sentinel for integer columns whose field is absent from the record
+MISSING = -(2 ** 63)
+
+DAY_MS = 86400 * 1000
+
+# UTC offsets are whole multiples of 15 minutes, so every attempt inside one
+# of these slots falls on the same local date
+SLOT_MS = 15 * 60 * 1000
+
+# Map display symbols to standard operation names
+OP_SYMBOLS = {
+    "+": "addition",
+    "−": "subtraction",
+    "×": "multiplication",
+    "÷": "division"
+}
+
+# Fields with a dedicated column; anything else (or a value of an unexpected
+# type) is kept per row in `extras`
+KNOWN_FIELDS = ("id", "operation", "digits", "question", "num1", "num2",
+                "userAnswer", "correctAnswer", "isCorrect", "timeTaken", "timestamp", "operands",
+                "timestampMs")
+
+
+def parse_operands(question: Any, operation: Any) -> Optional[Tuple[int, int, Any]]:
+    """Extract (num1, num2, op) from a question string like "7 × 8" or "7 × 8 = ?"."""
+    if not isinstance(question, str):
+        return None
+    parts = question.split()
+    if len(parts) < 3:
+        # Maybe it has " = ?" at the end
+        parts = question.replace("= ?", "").strip().split()
+    if len(parts) < 3:
+        return None
+    try:
+        num1 = int(parts[0])
+        num2 = int(parts[2])
+    except ValueError:
+        return None
+    return num1, num2, OP_SYMBOLS.get(parts[1], operation)
+
+
+def timestamp_to_ms(ts: Any) -> Optional[int]:
+    """Convert an attempt timestamp (ISO string or epoch seconds) to epoch milliseconds."""
+    try:
+        if isinstance(ts, bool):
+            return None
+        if isinstance(ts, (int, float)):
+            return int(round(ts * 1000))
+        if isinstance(ts, str) and ts:
+            return int(round(datetime.fromisoformat(ts.replace("Z", "+00:00")).timestamp() * 1000))
+    except (ValueError, OSError, OverflowError):
+        pass
+    return None
+
+
+def record_ms(record: Dict[str, Any]) -> Optional[int]:
+    """Epoch milliseconds of an attempt, preferring the value normalized at ingest."""
+    ms = record.get("timestampMs")
+    if type(ms) is int:
+        return ms
+    return timestamp_to_ms(record.get("timestamp") or record.get("date"))
+
+
+def local_day(ms: int) -> str:
+    """Local calendar date ("YYYY-MM-DD") of an epoch-milliseconds timestamp."""
+    return datetime.fromtimestamp(ms / 1000).strftime("%Y-%m-%d")
+
+
+def ms_to_iso(ms: int) -> str:
+    """Format epoch milliseconds the way JavaScript's Date.toISOString does."""
+    dt = datetime.fromtimestamp(ms // 1000, tz=timezone.utc)
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.") + f"{ms % 1000:03d}Z"
+
+
+class AttemptColumns:
+    """
+    Column-oriented, array-backed storage for attempts.
+
+    Numeric fields live in typed arrays and the operation name is interned as a
+    small category code, so a long history costs a few bytes per attempt rather
+    than a dict per attempt. `row()` rebuilds the original dict for bridge payloads.
+
+    Operands come from the record's stored "operands" field (parsed once at
+    ingest) and feed a secondary index keyed by (operation, digits) holding
+    per-pair [total, correct, timeSum, timeCount] accumulators, so weakness
+    queries only touch the bucket they ask for.
+    """
+
+    def __init__(self):
+        self.ids = array("q")
+        self.ts_ms = array("q")
+        self.time_taken = array("d")
+        self.is_correct = array("b")
+        self.digits = array("q")
+        self.op_code = array("H")
+        self.num1 = array("q")
+        self.num2 = array("q")
+        self.user_answer = array("q")
+        self.correct_answer = array("q")
+
+        # Operands parsed from the question; pair_a is MISSING when unparseable
+        self.pair_a = array("q")
+        self.pair_b = array("q")
+        self.pair_op = array("H")
+
+        # 1 when the timestamp is canonical ISO and can be rebuilt from ts_ms
+        self.ts_canonical = array("b")
+
+        # correct_prefix[i] = number of correct answers among the first i rows
+        self.correct_prefix = array("q", [0])
+
+        # Timestamp index: rows with a timestamp ordered by (ts_ms, row), kept as
+        # two parallel arrays so range lookups are a bisect on ts_sorted
+        self.ts_sorted = array("q")
+        self.ts_rows = array("q")
+
+        self.questions: List[Optional[str]] = []
+        self.categories: List[Any] = []
+        self._codes: Dict[Any, int] = {}
+        self._interned: Dict[str, str] = {}
+        self.extras: Dict[int, Dict[str, Any]] = {}
+
+        # (operation, digits) -> {(num1, num2, op): [total, correct, timeSum, timeCount]}
+        self.pair_index: Dict[Tuple[Any, int], Dict[Tuple[int, int, Any], List[float]]] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def code(self, category: Any) -> int:
+        """Return the interned code for a category value, assigning one if new."""
+        code = self._codes.get(category)
+        if code is None:
+            code = len(self.categories)
+            self.categories.append(category)
+            self._codes[category] = code
+        return code
+
+    def code_of(self, category: Any) -> Optional[int]:
+        return self._codes.get(category)
+
+    def append(self, record: Dict[str, Any]) -> None:
+        row = len(self.ids)
+        extras: Dict[str, Any] = {}
+
+        for field, column in (("id", self.ids), ("digits", self.digits), ("num1", self.num1),
+                              ("num2", self.num2), ("userAnswer", self.user_answer),
+                              ("correctAnswer", self.correct_answer)):
+            value = record.get(field, MISSING)
+            if type(value) is int and value != MISSING:
+                column.append(value)
+            else:
+                column.append(MISSING)
+                if field in record:
+                    extras[field] = value
+
+        operation = record.get("operation")
+        if isinstance(operation, str):
+            self.op_code.append(self.code(operation))
+        else:
+            self.op_code.append(self.code(None))
+            if "operation" in record:
+                extras["operation"] = operation
+
+        question = record.get("question")
+        if isinstance(question, str):
+            self.questions.append(self._interned.setdefault(question, question))
+        else:
+            self.questions.append(None)
+            if "question" in record:
+                extras["question"] = question
+
+        is_correct = record.get("isCorrect")
+        self.is_correct.append(1 if is_correct else 0)
+        self.correct_prefix.append(self.correct_prefix[-1] + self.is_correct[row])
+        if "isCorrect" in record and not isinstance(is_correct, bool):
+            extras["isCorrect"] = is_correct
+
+        time_taken = record.get("timeTaken")
+        if isinstance(time_taken, (int, float)) and not isinstance(time_taken, bool):
+            self.time_taken.append(float(time_taken))
+        else:
+            try:
+                self.time_taken.append(float(time_taken or 0))
+            except (TypeError, ValueError):
+                self.time_taken.append(0.0)
+            if "timeTaken" in record:
+                extras["timeTaken"] = time_taken
+
+        timestamp = record.get("timestamp")
+        ms = record_ms(record)
+        self.ts_ms.append(MISSING if ms is None else ms)
+        if ms is not None:
+            self._index_timestamp(row, ms)
+        if ms is not None and isinstance(timestamp, str) and ms_to_iso(ms) == timestamp:
+            self.ts_canonical.append(1)
+        else:
+            self.ts_canonical.append(0)
+            if "timestamp" in record:
+                extras["timestamp"] = timestamp
+
+        operands = record.get("operands")
+        if not (isinstance(operands, list) and len(operands) == 3):
+            # Attempts stored before operands were persisted
+            operands = parse_operands(question, operation)
+        if operands:
+            self.pair_a.append(operands[0])
+            self.pair_b.append(operands[1])
+            self.pair_op.append(self.code(operands[2]))
+            self._index_pair(row, (operands[0], operands[1], operands[2]))
+        else:
+            self.pair_a.append(MISSING)
+            self.pair_b.append(MISSING)
+            self.pair_op.append(0)
+
+        for field, value in record.items():
+            if field not in KNOWN_FIELDS:
+                extras[field] = value
+        if extras:
+            self.extras[row] = extras
+
+    def _index_timestamp(self, row: int, ms: int) -> None:
+        sorted_ms = self.ts_sorted
+        if not sorted_ms or ms >= sorted_ms[-1]:
+            # Attempts almost always arrive in time order
+            sorted_ms.append(ms)
+            self.ts_rows.append(row)
+        else:
+            pos = bisect_right(sorted_ms, ms)
+            sorted_ms.insert(pos, ms)
+            self.ts_rows.insert(pos, row)
+
+    def _index_pair(self, row: int, pair: Tuple[int, int, Any]) -> None:
+        """Add row to the per-pair accumulators of its (operation, digits) bucket."""
+        bucket_key = (self.categories[self.op_code[row]], self.digits[row])
+        bucket = self.pair_index.get(bucket_key)
+        if bucket is None:
+            bucket = self.pair_index[bucket_key] = {}
+        acc = bucket.get(pair)
+        if acc is None:
+            acc = bucket[pair] = [0, 0, 0.0, 0]
+        acc[0] += 1
+        acc[1] += self.is_correct[row]
+        t = self.time_taken[row]
+        if t:
+            acc[2] += t
+            acc[3] += 1
+
+    def extend(self, records: List[Dict[str, Any]]) -> None:
+        for record in records:
+            self.append(record)
+
+    def row(self, i: int) -> Dict[str, Any]:
+        """Rebuild the attempt dict for row i (the dict-view used by bridge payloads)."""
+        extras = self.extras.get(i, {})
+        record: Dict[str, Any] = {}
+
+        def put(field: str, value: Any, present: bool) -> None:
+            if field in extras:
+                record[field] = extras[field]
+            elif present:
+                record[field] = value
+
+        put("id", self.ids[i], self.ids[i] != MISSING)
+        operation = self.categories[self.op_code[i]]
+        put("operation", operation, operation is not None)
+        put("digits", self.digits[i], self.digits[i] != MISSING)
+        put("question", self.questions[i], self.questions[i] is not None)
+        put("num1", self.num1[i], self.num1[i] != MISSING)
+        put("num2", self.num2[i], self.num2[i] != MISSING)
+        put("userAnswer", self.user_answer[i], self.user_answer[i] != MISSING)
+        put("correctAnswer", self.correct_answer[i], self.correct_answer[i] != MISSING)
+        put("isCorrect", bool(self.is_correct[i]), True)
+        put("timeTaken", self.time_taken[i], True)
+        put("timestamp", ms_to_iso(self.ts_ms[i]) if self.ts_canonical[i] else None,
+            bool(self.ts_canonical[i]))
+        if self.ts_ms[i] != MISSING:
+            record["timestampMs"] = self.ts_ms[i]
+        if self.pair_a[i] != MISSING:
+            record["operands"] = [self.pair_a[i], self.pair_b[i], self.categories[self.pair_op[i]]]
+
+        for field, value in extras.items():
+            if field not in record:
+                record[field] = value
+        return record
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(len(self.ids)):
+            yield self.row(i)
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        return [self.row(i) for i in range(len(self.ids))]
+
+    def latest_timestamp(self) -> Tuple[int, Any]:
+        """Return (epoch ms, raw timestamp) of the newest attempt, or (0, "")."""
+        best, best_row = 0, -1
+        for i, ms in enumerate(self.ts_ms):
+            if ms != MISSING and ms > best:
+                best, best_row = ms, i
+        if best_row < 0:
+            return 0, ""
+        return best, self.row(best_row).get("timestamp", "")
+
+    def select(self, since_ms: Optional[int] = None, until_ms: Optional[int] = None,
+               operation: Optional[str] = None, digits: Optional[int] = None,
+               after: Optional[Tuple[int, int]] = None,
+               limit: Optional[int] = None) -> Tuple[List[int], Optional[Tuple[int, int]]]:
+        """
+        Rows with since_ms <= timestamp < until_ms, ordered by (timestamp, row).
+
+        The time bounds and the `after` position (a (ts_ms, row) pair from an
+        earlier page) are resolved by bisecting the timestamp index; falsy
+        operation/digits mean "no filter"; `limit` must be at least 1. Returns the
+        rows and, when `limit` cut the page short, the position to continue after.
+        """
+        sorted_ms, ts_rows = self.ts_sorted, self.ts_rows
+        lo = 0 if since_ms is None else bisect_left(sorted_ms, since_ms)
+        hi = len(sorted_ms) if until_ms is None else bisect_left(sorted_ms, until_ms)
+        if after is not None:
+            after_ms, after_row = after
+            pos = bisect_left(sorted_ms, after_ms)
+            while pos < hi and sorted_ms[pos] == after_ms and ts_rows[pos] <= after_row:
+                pos += 1
+            lo = max(lo, pos)
+
+        op_code = None
+        if operation:
+            op_code = self.code_of(operation)
+            if op_code is None:
+                return [], None
+
+        rows: List[int] = []
+        for pos in range(lo, hi):
+            i = ts_rows[pos]
+            if op_code is not None and self.op_code[i] != op_code:
+                continue
+            if digits and self.digits[i] != digits:
+                continue
+            if limit is not None and len(rows) >= limit:
+                return rows, (self.ts_ms[rows[-1]], rows[-1])
+            rows.append(i)
+        return rows, None
+
+    def chunk_correct(self, window: int) -> List[Tuple[int, int]]:
+        """(attempts, correct) for consecutive chunks of `window` rows, from prefix sums."""
+        n = len(self.ids)
+        prefix = self.correct_prefix
+        return [(min(window, n - i), prefix[min(i + window, n)] - prefix[i])
+                for i in range(0, n, window)]
+
+    def recent(self, limit: int) -> List[Dict[str, Any]]:
+        """The `limit` newest attempts by timestamp, newest first."""
+        ts_ms = self.ts_ms
+        rows = heapq.nlargest(limit, range(len(ts_ms)), key=lambda i: (ts_ms[i], i))
+        return [self.row(i) for i in rows]
+
+    def group_totals(self, keys: array) -> Dict[int, List[float]]:
+        """Grouped [count, correct, timeSum, timeSqSum] reduction over a code column."""
+        if np is not None and len(keys):
+            k = np.frombuffer(keys, dtype=np.int64 if keys.typecode == "q" else np.uint16)
+            uniq, inverse = np.unique(k, return_inverse=True)
+            t = np.frombuffer(self.time_taken, dtype=np.float64)
+            c = np.frombuffer(self.is_correct, dtype=np.int8).astype(np.float64)
+            counts = np.bincount(inverse)
+            correct = np.bincount(inverse, weights=c)
+            sums = np.bincount(inverse, weights=t)
+            sq_sums = np.bincount(inverse, weights=t * t)
+            return {int(key): [int(counts[j]), int(correct[j]), float(sums[j]), float(sq_sums[j])]
+                    for j, key in enumerate(uniq)}
+
+        totals: Dict[int, List[float]] = {}
+        for key, correct, t in zip(keys, self.is_correct, self.time_taken):
+            bucket = totals.get(key)
+            if bucket is None:
+                bucket = totals[key] = [0, 0, 0.0, 0.0]
+            bucket[0] += 1
+            bucket[1] += correct
+            bucket[2] += t
+            bucket[3] += t * t
+        return totals
+
+    def pair_stats(self, operation: Optional[str] = None,
+                   digits: Optional[int] = None) -> Dict[Tuple[int, int, Any], List[float]]:
+        """
+        Per operand pair [total, correct, timeSum, timeCount] for the matching buckets.
+
+        Falsy operation/digits mean "no filter"; only non-zero times are counted
+        towards the time totals. The result must be treated as read-only.
+        """
+        if operation and digits:
+            return self.pair_index.get((operation, digits), {})
+
+        buckets = [bucket for (op, d), bucket in self.pair_index.items()
+                   if (not operation or op == operation) and (not digits or d == digits)]
+        if len(buckets) == 1:
+            return buckets[0]
+
+        merged: Dict[Tuple[int, int, Any], List[float]] = {}
+        for bucket in buckets:
+            for pair, acc in bucket.items():
+                total = merged.get(pair)
+                if total is None:
+                    merged[pair] = list(acc)
+                else:
+                    for j in range(4):
+                        total[j] += acc[j]
+        return merged
+
+    def daily_rollup(self) -> Dict[str, List[float]]:
+        """[attempts, correct, totalTime] per local calendar date.
+
+        Rows are first grouped into 15-minute slots so only one date conversion
+        is done per slot rather than per attempt.
+        """
+        slots: Dict[int, List[float]] = {}
+        for ms, correct, t in zip(self.ts_ms, self.is_correct, self.time_taken):
+            if ms == MISSING:
+                continue
+            acc = slots.get(ms // SLOT_MS)
+            if acc is None:
+                acc = slots[ms // SLOT_MS] = [0, 0, 0.0]
+            acc[0] += 1
+            acc[1] += correct
+            acc[2] += t
+
+        days: Dict[str, List[float]] = {}
+        for slot, (count, correct, t) in sorted(slots.items()):
+            try:
+                day = local_day(slot * SLOT_MS)
+            except (ValueError, OSError, OverflowError):
+                continue
+            acc = days.get(day)
+            if acc is None:
+                days[day] = [count, correct, t]
+            else:
+                acc[0] += count
+                acc[1] += correct
+                acc[2] += t
+        return days
@@ -1,7 +1,170 @@
 import json
+import math
 import os
-from datetime import datetime
-from typing import Any, Dict, List
+import time
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from .attempts_columns import (MISSING, AttemptColumns, local_day, parse_operands, record_ms,
+                               timestamp_to_ms)
+from .attempts_sqlite import DB_NAME, SqliteAttemptRepository
+from .attempts_store import AttemptLogStore, attempt_fingerprint
+from .write_behind import WriteBehind
+
+# Values of the "attemptsBackend" setting
+BACKEND_LOG = "log"
+BACKEND_SQLITE = "sqlite"
+
+
+def _sanitize_attempt(attempt: Dict[str, Any]) -> None:
+    """Fill in the fields statistics and charts rely on."""
+    attempt.setdefault("isCorrect", False)
+    attempt.setdefault("timeTaken", 0)
+    attempt.setdefault("operation", "unknown")
+
+
+def _prepare_attempt(attempt: Dict[str, Any]) -> None:
+    """Normalize an attempt before it is written to the log.
+
+    Operands are parsed from the question here, once, and stored with the
+    attempt so later loads and weakness queries never re-parse question strings.
+    The timestamp is likewise normalized to integer epoch milliseconds.
+    """
+    _sanitize_attempt(attempt)
+    if "timestampMs" not in attempt:
+        ms = timestamp_to_ms(attempt.get("timestamp") or attempt.get("date"))
+        if ms is not None:
+            attempt["timestampMs"] = ms
+    if "operands" not in attempt:
+        operands = parse_operands(attempt.get("question"), attempt.get("operation"))
+        if operands:
+            attempt["operands"] = list(operands)
+
+
+def _to_ms(value: Any) -> Optional[int]:
+    """A since/until bound: epoch milliseconds (as JavaScript's Date.now()) or an ISO date string."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return int(value)
+    ms = timestamp_to_ms(value) if isinstance(value, str) else None
+    if ms is None:
+        raise ValueError(f"Invalid time bound: {value!r}")
+    return ms
+
+
+def _parse_cursor(cursor: Optional[str]) -> Optional[Tuple[int, int]]:
+    """Decode an opaque "ms:position" page cursor."""
+    if not cursor:
+        return None
+    ms, _, position = str(cursor).partition(":")
+    try:
+        return int(ms), int(position)
+    except ValueError:
+        raise ValueError(f"Invalid page cursor: {cursor!r}") from None
+
+
+def _to_digits(value: Any) -> Optional[int]:
+    """A digits filter as sent by the UI (number or numeric string); empty means no filter."""
+    if value is None or value == "":
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid digits filter: {value!r}") from None
+
+
+def _to_limit(value: Any) -> Optional[int]:
+    """A page size of at least one row; None means no limit."""
+    if value is None:
+        return None
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid page size: {value!r}") from None
+    if limit < 1:
+        raise ValueError(f"Invalid page size: {value!r}")
+    return limit
+
+
+def _format_cursor(after: Optional[Tuple[int, int]]) -> Optional[str]:
+    return f"{after[0]}:{after[1]}" if after is not None else None
+
+
+def _new_aggregates() -> Dict[str, Any]:
+    # byDay maps a local date to [attempts, correct, totalTime]
+    return {"total": _empty_bucket(), "byOperation": {}, "byDigits": {}, "byDay": {}}
+
+
+def _empty_bucket() -> Dict[str, Any]:
+    return {"count": 0, "correct": 0, "timeSum": 0.0, "timeSqSum": 0.0}
+
+
+def _accumulate(aggregates: Dict[str, Any], attempt: Dict[str, Any]) -> None:
+    """Add one attempt to the running totals, per operation, per digits and per local day."""
+    try:
+        time_taken = float(attempt.get("timeTaken", 0) or 0)
+    except (TypeError, ValueError):
+        time_taken = 0.0
+    correct = 1 if attempt.get("isCorrect") else 0
+
+    op_key = str(attempt.get("operation", "unknown"))
+    digits_key = str(attempt.get("digits", "unknown"))
+    buckets = (
+        aggregates["total"],
+        aggregates["byOperation"].setdefault(op_key, _empty_bucket()),
+        aggregates["byDigits"].setdefault(digits_key, _empty_bucket()),
+    )
+    for bucket in buckets:
+        bucket["count"] += 1
+        bucket["correct"] += correct
+        bucket["timeSum"] += time_taken
+        bucket["timeSqSum"] += time_taken * time_taken
+
+    ms = record_ms(attempt)
+    if ms is not None:
+        day = aggregates["byDay"].setdefault(local_day(ms), [0, 0, 0.0])
+        day[0] += 1
+        day[1] += correct
+        day[2] += time_taken
+
+
+def _bucket_from_sums(sums: List[float]) -> Dict[str, Any]:
+    count, correct, time_sum, time_sq_sum = sums
+    return {"count": int(count), "correct": int(correct), "timeSum": time_sum, "timeSqSum": time_sq_sum}
+
+
+def _aggregates_from_groups(by_operation: Dict[Any, List[float]],
+                            by_digits: Dict[Any, List[float]]) -> Dict[str, Any]:
+    """Build the running-totals structure from grouped [count, correct, timeSum, timeSqSum] sums."""
+    aggregates = _new_aggregates()
+    total = aggregates["total"]
+    for op, sums in by_operation.items():
+        aggregates["byOperation"][str(op if op is not None else "unknown")] = _bucket_from_sums(sums)
+    for digits, sums in by_digits.items():
+        key = str(digits) if digits is not None else "unknown"
+        aggregates["byDigits"][key] = _bucket_from_sums(sums)
+        total["count"] += int(sums[0])
+        total["correct"] += int(sums[1])
+        total["timeSum"] += sums[2]
+        total["timeSqSum"] += sums[3]
+    return aggregates
+
+
+def _summarize_bucket(bucket: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn running sums into the count/accuracy/avgTime shape the UI expects."""
+    count = bucket["count"]
+    if count == 0:
+        return {"count": 0, "correct": 0, "accuracy": 0.0, "avgTime": 0.0, "timeStdDev": 0.0}
+    mean = bucket["timeSum"] / count
+    variance = max(0.0, bucket["timeSqSum"] / count - mean * mean)
+    return {
+        "count": count,
+        "correct": bucket["correct"],
+        "accuracy": bucket["correct"] / count * 100,
+        "avgTime": mean,
+        "timeStdDev": math.sqrt(variance)
+    }
 
 
 class AttemptsManager:
@@ -12,40 +175,402 @@ class AttemptsManager:
         self.data_dir = os.path.join(addon_path, "data")
         self.static_file = os.path.join(self.data_dir, "attempts.json")
         self.user_file = os.path.join(self.data_dir, "user", "attempts.json")
+        self.store_dir = os.path.join(self.data_dir, "user", "attempts")
+        self.sqlite_path = os.path.join(self.data_dir, "user", DB_NAME)
+        self.settings_file = os.path.join(self.data_dir, "user", "setting.json")
 
         os.makedirs(os.path.dirname(self.user_file), exist_ok=True)
 
-        self.attempts_data: Dict[str, Any] = self.load_attempts()
+        # Log writes run on a background thread so saving never waits on the disk
+        self.writer = WriteBehind.from_settings("MathDrillAttemptsWriter", self.settings_file)
+        self.store = AttemptLogStore(self.store_dir, self.writer)
+        self._recover_journal()
+        # Set while the SQLite backend is selected; queries then go to SQL
+        self.sqlite: Optional[SqliteAttemptRepository] = None
+        self.backend = BACKEND_LOG
+        self._seed_store()
+
+        # Columnar in-memory copy of all attempts, validated against the files on disk
+        self._cache: Optional[AttemptColumns] = None
+        self._disk_state: Tuple = self._disk_key()
+        # Bumped whenever the set of attempts changes; seeded from the clock so
+        # versions handed to the UI keep increasing across sessions
+        self.generation = time.time_ns() // 1000
+        # (key, payload) of the last chart data request
+        self._chart_cache: Optional[Tuple[Tuple, Dict[str, Any]]] = None
+
+        self.set_backend(self._configured_backend())
+        # After the backend is chosen, so a legacy file lands in the active store
+        if self._migrate_legacy_file():
+            self._cache = None
+            self._disk_state = self._disk_key()
 
     def _default_structure(self) -> Dict[str, Any]:
-        return {"lastId": 0, "attempts": [], "lastSaved": "", "totalAttempts": 0}
+        return {"lastId": 0, "attempts": [], "lastSaved": "", "totalAttempts": 0, "count": 0, "nextCursor": None}
 
-    def load_attempts(self) -> Dict[str, Any]:
-        """Load attempts from user file if present, otherwise fall back to static file or empty structure."""
+    def _recover_journal(self) -> None:
+        """Replay attempts journaled before an unclean shutdown into the log."""
+        try:
+            restored = self.store.recover()
+            if restored:
+                # Derived fields were computed without the restored attempts
+                self.store.update_manifest({"syncCursor": None, "aggregates": None})
+                print(f"Recovered {restored} journaled attempts into {self.store_dir}")
+        except Exception as e:
+            print(f"Error recovering attempts journal: {e}")
+
+    def checkpoint(self) -> None:
+        """Write out queued saves and make them durable; called when the dialog closes."""
+        try:
+            self.writer.flush()
+            if self.sqlite is not None:
+                self.sqlite.checkpoint()
+            else:
+                self.store.checkpoint()
+        except Exception as e:
+            print(f"Error checkpointing attempts: {e}")
+
+    def close(self) -> None:
+        """Stop the background writer and close the SQLite database; call after checkpoint()."""
+        try:
+            self.writer.close()
+        except Exception as e:
+            print(f"Error stopping attempts writer: {e}")
+        if self.sqlite is not None:
+            self.sqlite.close()
+
+    def _seed_store(self) -> None:
+        """Seed a fresh install's log from the bundled static attempts file.
+
+        Runs before the backend is applied, so a configured SQLite backend
+        picks the seeded attempts up when it is first activated.
+        """
+        try:
+            if (not os.path.exists(self.user_file) and not self.store.exists()
+                    and os.path.exists(self.static_file)):
+                count = self.store.import_monolithic(self.static_file, _prepare_attempt)
+                print(f"Seeded {count} attempts from {self.static_file}")
+        except Exception as e:
+            print(f"Error seeding attempts: {e}")
+
+    def _migrate_legacy_file(self) -> bool:
+        """One-time migration of a monolithic attempts.json into the active store.
+
+        A user attempts.json (left by older versions or dropped in by an import)
+        replaces the contents of the log or, with SQLite active, the database,
+        and is then renamed so it is not migrated twice. Returns whether a
+        file was migrated.
+        """
         try:
             if os.path.exists(self.user_file):
-                with open(self.user_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                print(f"Loaded user attempts from {self.user_file}")
-                return data
-
-            if os.path.exists(self.static_file):
-                with open(self.static_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                print(f"Loaded static attempts from {self.static_file}")
-                return data
-
-            print(f"  No attempts file found, using empty structure")
-            return self._default_structure()
+                if self.sqlite is not None:
+                    count = self.sqlite.import_attempts_json(self.user_file, _prepare_attempt)
+                else:
+                    count = self.store.import_monolithic(self.user_file, _prepare_attempt)
+                    # The imported history decides the sync position and totals, not the old log's
+                    self.store.update_manifest({"syncCursor": None, "aggregates": None})
+                os.replace(self.user_file, self.user_file + ".migrated")
+                print(f"Migrated {count} attempts from {self.user_file}")
+                self.generation += 1
+                return True
+        except Exception as e:
+            print(f"Error migrating attempts: {e}")
+        return False
+
+    def _configured_backend(self) -> str:
+        """Read the "attemptsBackend" choice from the user settings file."""
+        try:
+            if os.path.exists(self.settings_file):
+                with open(self.settings_file, "r", encoding="utf-8") as f:
+                    return json.load(f).get("attemptsBackend", BACKEND_LOG)
+        except Exception as e:
+            print(f"Error reading attempts backend setting: {e}")
+        return BACKEND_LOG
+
+    def set_backend(self, backend: Optional[str]) -> str:
+        """Switch attempt storage between the segmented log and SQLite.
+
+        The attempts move with the switch: enabling SQLite migrates the log into
+        the database, and switching back copies anything saved while SQLite was
+        active into the log. Returns the backend actually in use.
+        """
+        backend = BACKEND_SQLITE if backend == BACKEND_SQLITE else BACKEND_LOG
+        try:
+            if backend == BACKEND_SQLITE:
+                if self.sqlite is None:
+                    self.sqlite = SqliteAttemptRepository(self.sqlite_path)
+                if not self.sqlite.get_meta("active"):
+                    self.migrate_to_sqlite()
+            elif self.sqlite is not None or os.path.exists(self.sqlite_path):
+                repo = self.sqlite or SqliteAttemptRepository(self.sqlite_path)
+                self.sqlite = None
+                if repo.get_meta("active"):
+                    count = self.store.rewrite(repo.records(), repo.last_id(), _prepare_attempt)
+                    self.store.update_manifest({"syncCursor": None, "aggregates": None})
+                    repo.update_meta({"active": False})
+                    print(f"Moved {count} attempts from {self.sqlite_path} back to {self.store_dir}")
+                repo.close()
+        except Exception as e:
+            print(f"Error switching attempts backend to {backend}: {e}")
+            if self.sqlite is not None:
+                self.sqlite.close()
+                self.sqlite = None
+            backend = BACKEND_LOG
+
+        if backend != self.backend:
+            self.backend = backend
+            self._cache = None
+            self._disk_state = self._disk_key()
+            self.generation += 1
+        return backend
+
+    def migrate_to_sqlite(self, source: Optional[str] = None) -> int:
+        """Fill the SQLite database from the attempts log, or from a monolithic attempts.json.
+
+        Replaces whatever the database held and marks it as the active store.
+        """
+        if self.sqlite is None:
+            self.sqlite = SqliteAttemptRepository(self.sqlite_path)
+        if source:
+            count = self.sqlite.import_attempts_json(source, _prepare_attempt)
+        else:
+            count = self.sqlite.replace_all(self.store.iter_records(),
+                                            self.store.manifest.get("lastId", 0), _prepare_attempt)
+        self.sqlite.update_meta({"active": True})
+        print(f"Migrated {count} attempts into {self.sqlite_path}")
+        return count
+
+    def _query_source(self) -> Union[SqliteAttemptRepository, AttemptColumns]:
+        """The object weakness/heatmap queries run against for the active backend."""
+        self._check_disk()
+        if self.sqlite is not None:
+            return self.sqlite
+        return self._get_columns()
+
+    def data_version(self) -> str:
+        """Version tag that changes whenever query results may change.
+
+        Covers saved or imported attempts, outside edits, backend switches (all
+        of which bump the generation) and the local date, since streaks and
+        daily series are relative to today.
+        """
+        self._check_disk()
+        return f"{self.generation}-{date.today().isoformat()}"
+
+    def _last_id(self) -> int:
+        if self.sqlite is not None:
+            return self.sqlite.last_id()
+        return self.store.manifest.get("lastId", 0)
+
+    def _disk_key(self) -> Tuple:
+        """Cheap fingerprint of the files that can change behind our back.
+
+        Covers the log manifest (rewritten on every append or compaction) and the
+        legacy attempts.json that imports and manual edits drop in.
+        """
+        key = []
+        for path in (self.store.manifest_path, self.user_file):
+            try:
+                st = os.stat(path)
+                key.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                key.append(None)
+        return tuple(key)
+
+    def _check_disk(self) -> None:
+        """Drop cached state if the files changed since we last read or wrote them."""
+        if self.store.pending:
+            # Our own queued writes are still reaching the files
+            return
+        key = self._disk_key()
+        if key == self._disk_state:
+            return
+        if key[0] == self.store.written_key and key[1] == self._disk_state[1]:
+            # Only the background writer's manifest updates changed the files
+            self._disk_state = key
+            return
+
+        # An import, a manual edit or another instance touched the store
+        if self.sqlite is None:
+            self._seed_store()
+        self._migrate_legacy_file()
+        self.store.reload()
+        self._cache = None
+        self._disk_state = self._disk_key()
+        self.generation += 1
+
+    def _read_columns(self) -> AttemptColumns:
+        columns = AttemptColumns()
+        for record in self.store.iter_records():
+            _sanitize_attempt(record)
+            columns.append(record)
+        return columns
+
+    def _get_columns(self) -> AttemptColumns:
+        """Return all attempts in columnar form, parsing the log only when the files on disk changed."""
+        self._check_disk()
+        if self._cache is not None:
+            return self._cache
+
+        columns = self._read_columns()
+        if len(columns) != self.store.manifest.get("totalAttempts", 0):
+            # Torn lines or a stale manifest; repack so counts are accurate again
+            print("Attempts log is out of sync with its manifest, compacting")
+            self.store.compact()
+            columns = self._read_columns()
+
+        self._cache = columns
+        self._disk_state = self._disk_key()
+        return columns
+
+    def _get_aggregates(self) -> Dict[str, Any]:
+        """Return the persisted running totals, rebuilding them if they look wrong.
+
+        The totals are only recomputed from the full history after a migration
+        (which clears them) or when their count disagrees with the manifest.
+        With the SQLite backend they are computed by grouped SQL aggregates.
+        """
+        self._check_disk()
+        if self.sqlite is not None:
+            return _aggregates_from_groups(self.sqlite.group_totals("operation"),
+                                           self.sqlite.group_totals("digits"))
+
+        manifest = self.store.manifest
+        aggregates = manifest.get("aggregates")
+        if (aggregates and "byDay" in aggregates
+                and aggregates.get("total", {}).get("count") == manifest.get("totalAttempts", 0)):
+            return aggregates
+
+        print("Rebuilding attempt statistics aggregates")
+        columns = self._get_columns()
+        aggregates = _aggregates_from_groups(
+            {columns.categories[code]: sums for code, sums in columns.group_totals(columns.op_code).items()},
+            {(d if d != MISSING else None): sums for d, sums in columns.group_totals(columns.digits).items()})
+        aggregates["byDay"] = columns.daily_rollup()
+        self.store.update_manifest({"aggregates": aggregates})
+        self._disk_state = self._disk_key()
+        return aggregates
+
+    def _select_attempts(self, since_ms: Optional[int], until_ms: Optional[int], operation: Optional[str],
+                         digits: Optional[int], limit: Optional[int],
+                         after: Optional[Tuple[int, int]]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """One page of timestamp-ordered attempts and the cursor for the next page."""
+        if self.sqlite is not None:
+            attempts, next_after = self.sqlite.select(since_ms, until_ms, operation, digits, after, limit)
+        else:
+            columns = self._get_columns()
+            rows, next_after = columns.select(since_ms, until_ms, operation, digits, after, limit)
+            attempts = [columns.row(i) for i in rows]
+        return attempts, _format_cursor(next_after)
+
+    def load_attempts(self, since: Any = None, until: Any = None, operation: Optional[str] = None,
+                      digits: Optional[int] = None, limit: Optional[int] = None,
+                      cursor: Optional[str] = None) -> Dict[str, Any]:
+        """Load attempts from the active store into the classic single-document structure.
+
+        Without arguments every attempt is returned in insertion order. With a
+        time range (since <= timestamp < until, epoch ms or ISO strings), an
+        operation/digits filter or a page size, only matching attempts that have
+        a timestamp are returned, oldest first; "nextCursor" is then set when
+        more rows follow and can be passed back as `cursor` to get the next page.
+        "totalAttempts" is always the size of the whole history and "count" the
+        number of attempts returned.
+
+        Raises ValueError for an invalid time bound, cursor, digits or limit, so
+        a bad request is not mistaken for an empty history.
+        """
+        since_ms, until_ms = _to_ms(since), _to_ms(until)
+        after = _parse_cursor(cursor)
+        digits = _to_digits(digits)
+        limit = _to_limit(limit)
+        try:
+            self._check_disk()
+            next_cursor = None
+            if since_ms is None and until_ms is None and not operation and not digits \
+                    and limit is None and after is None:
+                if self.sqlite is not None:
+                    attempts = list(self.sqlite.records())
+                else:
+                    attempts = self._get_columns().to_dicts()
+            else:
+                attempts, next_cursor = self._select_attempts(since_ms, until_ms, operation, digits, limit, after)
+
+            if self.sqlite is not None:
+                last_saved = self.sqlite.get_meta("lastSaved", "")
+                total = self.sqlite.count()
+            else:
+                last_saved = self.store.manifest.get("lastSaved", "")
+                total = self.store.manifest.get("totalAttempts", 0)
+            return {
+                "lastId": self._last_id(),
+                "attempts": attempts,
+                "lastSaved": last_saved,
+                "totalAttempts": total,
+                "count": len(attempts),
+                "nextCursor": next_cursor
+            }
         except Exception as e:
             print(f"Error loading attempts: {e}")
             return self._default_structure()
 
+    def compact_attempts(self) -> int:
+        """Rewrite the attempts log into densely packed segments.
+
+        With the SQLite backend this checkpoints the write-ahead log instead.
+        """
+        if self.sqlite is not None:
+            self.sqlite.checkpoint()
+            return self.sqlite.count()
+        count = self.store.compact(_prepare_attempt)
+        self._cache = None
+        self._disk_state = self._disk_key()
+        self.generation += 1
+        return count
+
+    def get_sync_cursor(self) -> Dict[str, Any]:
+        """Return the high-water mark of attempts already synced from the practice UI.
+
+        The cursor holds the newest client timestamp stored so far (ISO string and
+        epoch milliseconds) plus the current lastId. Stores written before cursors
+        existed get one derived from their records once, which is then persisted.
+        """
+        self._check_disk()
+        if self.sqlite is not None:
+            cursor = self.sqlite.get_meta("syncCursor")
+            if not cursor:
+                ms, timestamp = self.sqlite.latest_timestamp()
+                cursor = {"timestamp": timestamp, "ms": ms}
+                self.sqlite.update_meta({"syncCursor": cursor})
+            return dict(cursor, lastId=self._last_id())
+
+        manifest = self.store.manifest
+        cursor = manifest.get("syncCursor")
+        if not cursor:
+            ms, timestamp = self._get_columns().latest_timestamp()
+            cursor = {"timestamp": timestamp, "ms": ms}
+            self.store.update_manifest({"syncCursor": cursor})
+            self._disk_state = self._disk_key()
+        return dict(cursor, lastId=manifest.get("lastId", 0))
+
+    def _advance_cursor(self, cursor: Optional[Dict[str, Any]],
+                        attempts: Any) -> Dict[str, Any]:
+        """Move the cursor forward to the newest timestamp among the given attempts."""
+        best_ms = (cursor or {}).get("ms", 0) or 0
+        best_ts = (cursor or {}).get("timestamp", "")
+        for attempt in attempts:
+            ts = attempt.get("timestamp")
+            ms = timestamp_to_ms(ts)
+            if ms is not None and ms > best_ms:
+                best_ms, best_ts = ms, ts
+        return {"timestamp": best_ts, "ms": best_ms}
+
     def save_attempts(self, attempts_payload: Any) -> Dict[str, Any]:
-        """Save incoming attempts to the user attempts file.
+        """Append incoming attempts to the user attempts log.
 
         Accepts either a single attempt dict, a list of attempts, or a dict with key 'attempts'.
-        Returns a summary dict with success flag and counts.
+        Saving is idempotent: attempts whose (timestamp, question, userAnswer) are already
+        stored are skipped instead of being re-added under a fresh id.
+        Returns a summary dict with success flag and inserted/deduplicated counts.
         """
         try:
             # Normalize incoming attempts to a list
@@ -59,91 +584,151 @@ class AttemptsManager:
                 return {"success": False, "message": "Unsupported payload format"}
 
             if not new_attempts:
-                return {"success": True, "added": 0, "message": "No attempts to add"}
-
-            data = self.load_attempts()
-            last_id = data.get("lastId", 0)
-            attempts_list: List[Dict[str, Any]] = data.get("attempts", [])
-
-            added_count = 0
+                return {"success": True, "added": 0, "inserted": 0, "deduplicated": 0,
+                        "message": "No attempts to add", "cursor": self.get_sync_cursor()}
+
+            self._check_disk()
+            source = self.sqlite if self.sqlite is not None else self.store
+            load_index = self.sqlite is None and not self.store.index_loaded
+            existing_ids = source.ids
+            existing_fingerprints = source.fingerprints
+            if load_index and self._disk_key() != self._disk_state:
+                # Loading the index repacked the log, so the cached list is stale
+                self._cache = None
+            last_id = self._last_id()
+
+            batch: List[Dict[str, Any]] = []
+            batch_ids = set()
+            batch_fingerprints = set()
+            seen: List[Dict[str, Any]] = []
             for attempt in new_attempts:
-                # Assign an id if missing or conflicting
                 if not isinstance(attempt, dict):
                     continue
 
-                if "id" not in attempt or attempt["id"] in [a.get("id") for a in attempts_list]:
-                    last_id += 1
-                    attempt["id"] = last_id
-                
                 # Ensure timestamp exists for heatmap
                 if "timestamp" not in attempt:
-                    import time
                     attempt["timestamp"] = time.time()
+                seen.append(attempt)
 
-                attempts_list.append(attempt)
-                added_count += 1
-
-            # Update summary fields
-            data["attempts"] = attempts_list
-            data["lastId"] = last_id
-            data["lastSaved"] = datetime.now().isoformat()
-            data["totalAttempts"] = len(attempts_list)
+                # Skip attempts we already have (re-sent by the UI)
+                fp = attempt_fingerprint(attempt)
+                if fp in existing_fingerprints or fp in batch_fingerprints:
+                    continue
+                batch_fingerprints.add(fp)
 
-            # Ensure directory
-            os.makedirs(os.path.dirname(self.user_file), exist_ok=True)
-            with open(self.user_file, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+                # Assign an id if missing or conflicting
+                if "id" not in attempt or attempt["id"] in existing_ids or attempt["id"] in batch_ids:
+                    last_id += 1
+                    attempt["id"] = last_id
+                batch_ids.add(attempt["id"])
 
-            self.attempts_data = data
+                _prepare_attempt(attempt)
+                batch.append(attempt)
 
-            print(f"Saved {added_count} new attempts to {self.user_file}")
-            return {"success": True, "added": added_count, "totalAttempts": data["totalAttempts"]}
+            cursor = self._advance_cursor(self.get_sync_cursor(), seen)
+            if self.sqlite is not None:
+                self.sqlite.append(batch, last_id, {"syncCursor": cursor})
+                total = self.sqlite.count()
+            else:
+                aggregates = self._get_aggregates()
+                # The writer thread serializes the manifest these totals live in
+                with self.store.lock:
+                    for attempt in batch:
+                        _accumulate(aggregates, attempt)
+                    self.store.append(batch, last_id, {"syncCursor": cursor, "aggregates": aggregates})
+                total = self.store.manifest.get("totalAttempts", 0)
+
+            if batch:
+                self.generation += 1
+            if self._cache is not None:
+                self._cache.extend(batch)
+            self._disk_state = self._disk_key()
+            deduplicated = len(seen) - len(batch)
+
+            target = self.sqlite_path if self.sqlite is not None else self.store_dir
+            print(f"Saved {len(batch)} new attempts to {target} ({deduplicated} duplicates skipped)")
+            return {
+                "success": True,
+                "added": len(batch),
+                "inserted": len(batch),
+                "deduplicated": deduplicated,
+                "totalAttempts": total,
+                "cursor": dict(cursor, lastId=self._last_id())
+            }
 
         except Exception as e:
             print(f"Error saving attempts: {e}")
             return {"success": False, "message": str(e)}
 
+    def _daily_rollup(self) -> Dict[str, List[float]]:
+        """[attempts, correct, totalTime] per local date, maintained on every append."""
+        if self.sqlite is not None:
+            self._check_disk()
+            return self.sqlite.daily_rollup()
+        return self._get_aggregates()["byDay"]
+
     def get_heatmap_data(self) -> Dict[str, int]:
         """Get aggregated attempt counts by date for heatmap visualization.
         
         Returns:
-            Dict mapping date strings (YYYY-MM-DD) to attempt counts
+            Dict mapping local date strings (YYYY-MM-DD) to attempt counts
         """
         try:
-            data = self.load_attempts()
-            attempts = data.get("attempts", [])
-            
-            date_counts = {}
-            for attempt in attempts:
-                # Get timestamp from attempt
-                ts = attempt.get("timestamp") or attempt.get("date")
-                if not ts:
-                    continue
-                
-                try:
-                    # Convert timestamp/date to date string
-                    from datetime import datetime
-                    if isinstance(ts, (int, float)):
-                        date_obj = datetime.fromtimestamp(ts)
-                    else:
-                        # Try parsing string format (ISO)
-                        ts_str = str(ts).replace("Z", "+00:00")
-                        date_obj = datetime.fromisoformat(ts_str)
-                        
-                    date_str = date_obj.strftime("%Y-%m-%d")
-                    
-                    # Increment count for this date
-                    date_counts[date_str] = date_counts.get(date_str, 0) + 1
-                except (ValueError, OSError, OverflowError) as e:
-                    # Skip invalid timestamps
-                    print(f"Invalid timestamp {timestamp}: {e}")
-                    continue
-            
-            return date_counts
+            return {day: int(acc[0]) for day, acc in self._daily_rollup().items()}
         except Exception as e:
             print(f"Error computing heatmap data: {e}")
             return {}
 
+    def get_daily_progress(self, days: int = 7) -> List[Dict[str, Any]]:
+        """Attempts, correct answers and total time for each of the last `days` local dates.
+
+        Oldest first and ending today; days without practice are included with zeros.
+        """
+        try:
+            rollup = self._daily_rollup()
+            today = date.today()
+            progress = []
+            for offset in range(days - 1, -1, -1):
+                day = (today - timedelta(days=offset)).isoformat()
+                attempts, correct, total_time = rollup.get(day, (0, 0, 0.0))
+                progress.append({
+                    "date": day,
+                    "attempts": int(attempts),
+                    "correct": int(correct),
+                    "totalTime": total_time
+                })
+            return progress
+        except Exception as e:
+            print(f"Error computing daily progress: {e}")
+            return []
+
+    def get_streaks(self) -> Dict[str, int]:
+        """Current and best runs of consecutive practice days.
+
+        The current streak only counts if the latest practice day is today or yesterday.
+        """
+        try:
+            days = sorted(date.fromisoformat(day) for day, acc in self._daily_rollup().items() if acc[0])
+            if not days:
+                return {"current": 0, "best": 0}
+
+            best = run = 1
+            for prev, cur in zip(days, days[1:]):
+                run = run + 1 if (cur - prev).days == 1 else 1
+                best = max(best, run)
+
+            current = 0
+            if (date.today() - days[-1]).days in (0, 1):
+                current = 1
+                for i in range(len(days) - 1, 0, -1):
+                    if (days[i] - days[i - 1]).days != 1:
+                        break
+                    current += 1
+            return {"current": current, "best": best}
+        except Exception as e:
+            print(f"Error computing streaks: {e}")
+            return {"current": 0, "best": 0}
+
     def get_weaknesses(self, operation: str = None, digits: int = None) -> List[Dict[str, Any]]:
         """
         Analyze attempts to find specific number pairs that the user struggles with.
@@ -153,73 +738,29 @@ class AttemptsManager:
         
         Returns a list of weakness objects: {"num1": int, "num2": int, "op": str, "reason": str}
         """
+        # pair_index is keyed on integer digits; the UI may send them as strings
+        digits = _to_digits(digits)
         try:
-            data = self.load_attempts()
-            attempts = data.get("attempts", [])
-            if not attempts:
-                return []
-
-            # Group attempts by pair and operation
-            stats = {} # key: (num1, num2, op)
-            
-            # Map display symbols to standard operation names
-            op_map = {
-                "+": "addition",
-                "−": "subtraction",
-                "×": "multiplication",
-                "÷": "division"
-            }
-
-            for a in attempts:
-                # Filter by operation/digits if provided
-                if operation and a.get("operation") != operation:
-                    continue
-                if digits and a.get("digits") != digits:
-                    continue
-
-                q_str = a.get("question", "")
-                # Try to parse operands from question string "A op B"
-                parts = q_str.split()
-                if len(parts) < 3:
-                    # Maybe it has " = ?" at the end
-                    parts = q_str.replace("= ?", "").strip().split()
-                
-                if len(parts) >= 3:
-                    try:
-                        num1 = int(parts[0])
-                        op_sym = parts[1]
-                        num2 = int(parts[2])
-                        op = op_map.get(op_sym, a.get("operation"))
-                        
-                        key = (num1, num2, op)
-                        if key not in stats:
-                            stats[key] = {"correct": 0, "total": 0, "times": []}
-                        
-                        stats[key]["total"] += 1
-                        if a.get("isCorrect"):
-                            stats[key]["correct"] += 1
-                        
-                        if a.get("timeTaken"):
-                            stats[key]["times"].append(float(a["timeTaken"]))
-                    except (ValueError, IndexError):
-                        continue
+            # Grouped per (num1, num2, op): [total, correct, timeSum, timeCount]
+            stats = self._query_source().pair_stats(operation, digits)
 
             if not stats:
                 return []
 
             # Calculate global averages for comparison
-            all_times = [t for s in stats.values() for t in s["times"]]
-            global_avg_time = sum(all_times) / len(all_times) if all_times else 5.0
+            time_sum = sum(s[2] for s in stats.values())
+            time_count = sum(s[3] for s in stats.values())
+            global_avg_time = time_sum / time_count if time_count else 5.0
             
             weaknesses = []
-            for (n1, n2, op), s in stats.items():
-                accuracy = s["correct"] / s["total"]
-                avg_time = sum(s["times"]) / len(s["times"]) if s["times"] else 0
+            for (n1, n2, op), (total, correct, pair_time, pair_timed) in stats.items():
+                accuracy = correct / total
+                avg_time = pair_time / pair_timed if pair_timed else 0
                 
                 reason = None
-                if accuracy < 0.7 and s["total"] >= 2:
+                if accuracy < 0.7 and total >= 2:
                     reason = "accuracy"
-                elif avg_time > global_avg_time * 1.5 and s["total"] >= 2:
+                elif avg_time > global_avg_time * 1.5 and total >= 2:
                     reason = "speed"
                 
                 if reason:
@@ -241,92 +782,122 @@ class AttemptsManager:
             print(f"Error getting weaknesses: {e}")
             return []
 
-    def get_attempt_statistics(self) -> Dict[str, Any]:
-        """Compute basic statistics from available attempts."""
+    def get_accuracy_trend(self, buckets: int = 10) -> Dict[str, List[Any]]:
+        """Accuracy over consecutive chunks of attempts, in insertion order.
+
+        Chunks hold max(5, total // buckets) attempts, so about `buckets` points
+        come back however long the history is. Labels are the 1-based index of
+        each chunk's first attempt.
+        """
         try:
-            data = self.load_attempts()
-            attempts = data.get("attempts", [])
-            total = len(attempts)
-            if total == 0:
-                return {
-                    "totalAttempts": 0, 
-                    "correctCount": 0, 
-                    "incorrectCount": 0, 
-                    "accuracy": 0.0, 
-                    "averageTime": 0.0,
-                    "byOperation": {},
-                    "attempts": []
-                }
-
-            # Validate and sanitize attempts
-            valid_attempts = []
-            for a in attempts:
-                if not isinstance(a, dict):
-                    continue
-                # Ensure required fields exist
-                if "isCorrect" not in a:
-                    a["isCorrect"] = False
-                if "timeTaken" not in a:
-                    a["timeTaken"] = 0
-                if "operation" not in a:
-                    a["operation"] = "unknown"
-                valid_attempts.append(a)
-            
-            total = len(valid_attempts)
-            if total == 0:
-                return {
-                    "totalAttempts": 0, 
-                    "correctCount": 0, 
-                    "incorrectCount": 0, 
-                    "accuracy": 0.0, 
-                    "averageTime": 0.0,
-                    "byOperation": {},
-                    "attempts": []
-                }
-
-            correct = sum(1 for a in valid_attempts if a.get("isCorrect"))
-            incorrect = total - correct
-            avg_time = sum((a.get("timeTaken", 0) or 0) for a in valid_attempts) / total
-            accuracy = (correct / total) * 100 if total > 0 else 0.0
-
-            by_op = {}
-            for a in valid_attempts:
-                op = a.get("operation", "unknown")
-                # Initialize operation stats if not present
-                if op not in by_op:
-                    by_op[op] = {
-                        "count": 0, 
-                        "correct": 0,
-                        "total_time": 0.0
-                    }
-                
-                # Update stats
-                by_op[op]["count"] += 1
-                by_op[op]["total_time"] += (a.get("timeTaken", 0) or 0)
-                
-                if a.get("isCorrect"):
-                    by_op[op]["correct"] += 1
-
-            # Convert by_op to final format with calculated fields
-            final_by_op = {}
-            for op, stats in by_op.items():
-                count = stats["count"]
-                final_by_op[op] = {
-                    "count": count,
-                    "correct": stats["correct"],
-                    "accuracy": (stats["correct"] / count * 100) if count > 0 else 0.0,
-                    "avgTime": (stats["total_time"] / count) if count > 0 else 0.0
-                }
+            source = self._query_source()
+            total = self._get_aggregates()["total"]["count"]
+            window = max(5, total // max(1, buckets))
+            labels, accuracy = [], []
+            for i, (count, correct) in enumerate(source.chunk_correct(window)):
+                labels.append(str(i * window + 1))
+                accuracy.append(round(correct / count * 100))
+            return {"labels": labels, "accuracy": accuracy}
+        except Exception as e:
+            print(f"Error computing accuracy trend: {e}")
+            return {"labels": [], "accuracy": []}
 
-            return {
-                "totalAttempts": total,
-                "correctCount": correct,
-                "incorrectCount": incorrect,
-                "accuracy": accuracy,
-                "averageTime": avg_time,
-                "byOperation": final_by_op,
-                "attempts": valid_attempts  # Include raw attempts for trend analysis
+    def get_chart_data(self, buckets: int = 10, days: int = 7,
+                       heatmap_days: int = 364, recent: int = 10) -> Dict[str, Any]:
+        """Chart-ready series for the analytics page.
+
+        Everything is read from the running aggregates and daily rollups, so
+        the payload size depends on the requested resolution (trend buckets,
+        days of progress and heatmap, recent rows) and not on the history size.
+        The result is reused until attempts change or the date rolls over.
+        """
+        self._check_disk()
+        today = date.today()
+        key = (self.generation, self.backend, today, buckets, days, heatmap_days, recent)
+        if self._chart_cache is not None and self._chart_cache[0] == key:
+            return self._chart_cache[1]
+
+        first_day = (today - timedelta(days=heatmap_days - 1)).isoformat()
+        heatmap = self.get_heatmap_data()
+        aggregates = self._get_aggregates()
+        try:
+            recent_attempts = self._query_source().recent(recent)
+        except Exception as e:
+            print(f"Error loading recent attempts: {e}")
+            recent_attempts = []
+
+        chart_data = {
+            "byOperation": {op: _summarize_bucket(b) for op, b in aggregates["byOperation"].items()},
+            "trend": self.get_accuracy_trend(buckets),
+            "dailyProgress": self.get_daily_progress(days),
+            "heatmap": {day: count for day, count in heatmap.items() if day >= first_day},
+            "streaks": self.get_streaks(),
+            "recentAttempts": recent_attempts
+        }
+        self._chart_cache = (key, chart_data)
+        return chart_data
+
+    def _filtered_aggregates(self, since_ms: Optional[int], until_ms: Optional[int],
+                             operation: Optional[str], digits: Optional[int]) -> Dict[str, Any]:
+        """Totals over the attempts in a time range / filter, found through the timestamp index."""
+        if self.sqlite is not None:
+            return _aggregates_from_groups(
+                self.sqlite.group_totals("operation", since_ms, until_ms, operation, digits),
+                self.sqlite.group_totals("digits", since_ms, until_ms, operation, digits))
+
+        columns = self._get_columns()
+        rows, _ = columns.select(since_ms, until_ms, operation, digits)
+        by_operation: Dict[Any, List[float]] = {}
+        by_digits: Dict[Any, List[float]] = {}
+        for i in rows:
+            t = columns.time_taken[i]
+            correct = columns.is_correct[i]
+            d = columns.digits[i]
+            for groups, key in ((by_operation, columns.categories[columns.op_code[i]]),
+                                (by_digits, d if d != MISSING else None)):
+                sums = groups.get(key)
+                if sums is None:
+                    sums = groups[key] = [0, 0, 0.0, 0.0]
+                sums[0] += 1
+                sums[1] += correct
+                sums[2] += t
+                sums[3] += t * t
+        return _aggregates_from_groups(by_operation, by_digits)
+
+    def get_attempt_statistics(self, include_attempts: bool = False, since: Any = None, until: Any = None,
+                               operation: Optional[str] = None, digits: Optional[int] = None,
+                               limit: Optional[int] = None, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """Compute basic statistics from the running aggregates.
+
+        Totals, accuracy and the per-operation/per-digits breakdowns are read from
+        sums maintained on every append, so the cost depends on the number of
+        operations rather than on the number of attempts. A time range or
+        operation/digits filter restricts the statistics to the matching attempts.
+        The raw attempts are only included when asked for (paged by limit/cursor
+        like load_attempts); charts use get_chart_data instead.
+        """
+        try:
+            digits = _to_digits(digits)
+            if since is not None or until is not None or operation or digits:
+                aggregates = self._filtered_aggregates(_to_ms(since), _to_ms(until), operation, digits)
+            else:
+                aggregates = self._get_aggregates()
+            total = _summarize_bucket(aggregates["total"])
+
+            stats = {
+                "totalAttempts": total["count"],
+                "correctCount": total["correct"],
+                "incorrectCount": total["count"] - total["correct"],
+                "accuracy": total["accuracy"],
+                "averageTime": total["avgTime"],
+                "byOperation": {op: _summarize_bucket(b) for op, b in aggregates["byOperation"].items()},
+                "byDigits": {d: _summarize_bucket(b) for d, b in aggregates["byDigits"].items()}
             }
+            if include_attempts:
+                page = self.load_attempts(since, until, operation, digits, limit, cursor)
+                stats["attempts"] = page["attempts"]
+                stats["nextCursor"] = page["nextCursor"]
+            return stats
         except Exception as e:
             print(f"Error computing attempt statistics: {e}")
             import traceback
@@ -0,0 +1,339 @@
+import json
+import os
+import sqlite3
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .attempts_columns import local_day, parse_operands, record_ms
+from .attempts_store import attempt_fingerprint
+
+DB_NAME = "attempts.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS attempts (
+    seq INTEGER PRIMARY KEY,
+    id TEXT NOT NULL,
+    fingerprint TEXT NOT NULL UNIQUE,
+    operation TEXT,
+    digits INTEGER,
+    num1 INTEGER,
+    num2 INTEGER,
+    op TEXT,
+    is_correct INTEGER NOT NULL DEFAULT 0,
+    time_taken REAL NOT NULL DEFAULT 0,
+    ts_ms INTEGER,
+    record TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_attempts_operation_digits ON attempts (operation, digits);
+CREATE INDEX IF NOT EXISTS idx_attempts_ts ON attempts (ts_ms);
+CREATE INDEX IF NOT EXISTS idx_attempts_pair ON attempts (num1, num2, op);
+CREATE INDEX IF NOT EXISTS idx_attempts_id ON attempts (id);
+CREATE TABLE IF NOT EXISTS daily (
+    day TEXT PRIMARY KEY,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    correct INTEGER NOT NULL DEFAULT 0,
+    total_time REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+INSERT_SQL = """
+INSERT OR IGNORE INTO attempts
+    (id, fingerprint, operation, digits, num1, num2, op, is_correct, time_taken, ts_ms, record)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+UPSERT_DAILY_SQL = """
+INSERT INTO daily (day, attempts, correct, total_time) VALUES (?, ?, ?, ?)
+ON CONFLICT (day) DO UPDATE SET
+    attempts = attempts + excluded.attempts,
+    correct = correct + excluded.correct,
+    total_time = total_time + excluded.total_time
+"""
+
+
+class _Lookup:
+    """Set-like membership test answered by an indexed column."""
+
+    def __init__(self, conn: sqlite3.Connection, column: str, encode: Callable[[Any], str]):
+        self._conn = conn
+        self._sql = f"SELECT 1 FROM attempts WHERE {column} = ? LIMIT 1"
+        self._encode = encode
+
+    def __contains__(self, value: Any) -> bool:
+        return self._conn.execute(self._sql, (self._encode(value),)).fetchone() is not None
+
+
+class SqliteAttemptRepository:
+    """
+    SQLite storage for practice attempts, using the built-in sqlite3 module.
+
+    Every attempt keeps its original JSON in `record`, next to the indexed
+    columns the dashboard queries filter and group on: (operation, digits),
+    the timestamp in epoch ms, and the operand pair (num1, num2, op) parsed
+    from the question. Statistics, weaknesses and time ranges are answered
+    with SQL aggregates, so memory use does not grow with the history. A
+    `daily` table holds [attempts, correct, total_time] per local date and is
+    updated in the same transaction as every insert. The database runs in WAL mode.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+
+        # Created on the GUI thread but queried from the bridge's worker lane;
+        # callers never use the connection from two threads at once
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        if self.count() and not self.conn.execute("SELECT 1 FROM daily LIMIT 1").fetchone():
+            # Databases created before the daily rollup existed
+            self.rebuild_daily()
+
+        self.ids = _Lookup(self.conn, "id", json.dumps)
+        self.fingerprints = _Lookup(self.conn, "fingerprint", str)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def checkpoint(self) -> None:
+        """Fold the write-ahead log back into the database file."""
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def get_meta(self, key: str, default: Any = None) -> Any:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def _put_meta(self, fields: Dict[str, Any]) -> None:
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            [(key, json.dumps(value, ensure_ascii=False)) for key, value in fields.items()])
+
+    def update_meta(self, fields: Dict[str, Any]) -> None:
+        with self.conn:
+            self._put_meta(fields)
+
+    def count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM attempts").fetchone()[0]
+
+    def last_id(self) -> int:
+        return self.get_meta("lastId", 0)
+
+    @staticmethod
+    def _row(record: Dict[str, Any]) -> Tuple:
+        """Project an attempt onto the indexed columns, keeping the full record as JSON."""
+        operation = record.get("operation")
+        digits = record.get("digits")
+        time_taken = record.get("timeTaken")
+        try:
+            time_taken = float(time_taken or 0)
+        except (TypeError, ValueError):
+            time_taken = 0.0
+
+        operands = record.get("operands")
+        if not (isinstance(operands, list) and len(operands) == 3):
+            operands = parse_operands(record.get("question"), operation) or (None, None, None)
+
+        return (
+            json.dumps(record.get("id")),
+            attempt_fingerprint(record),
+            operation if isinstance(operation, str) else None,
+            digits if type(digits) is int else None,
+            operands[0],
+            operands[1],
+            operands[2],
+            1 if record.get("isCorrect") else 0,
+            time_taken,
+            record_ms(record),
+            json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+        )
+
+    def _insert(self, records: Iterable[Dict[str, Any]],
+                prepare: Optional[Callable[[Dict[str, Any]], None]] = None) -> int:
+        max_id = 0
+        days: Dict[str, List[float]] = {}
+        for record in records:
+            if not isinstance(record, dict):
+                continue
+            if prepare is not None:
+                prepare(record)
+            if isinstance(record.get("id"), int):
+                max_id = max(max_id, record["id"])
+            row = self._row(record)
+            # Duplicate fingerprints are ignored, keeping the first copy
+            if self.conn.execute(INSERT_SQL, row).rowcount and row[9] is not None:
+                acc = days.setdefault(local_day(row[9]), [0, 0, 0.0])
+                acc[0] += 1
+                acc[1] += row[7]
+                acc[2] += row[8]
+        self.conn.executemany(UPSERT_DAILY_SQL, [(day, *acc) for day, acc in days.items()])
+        return max_id
+
+    def append(self, records: List[Dict[str, Any]], last_id: int,
+               fields: Optional[Dict[str, Any]] = None) -> None:
+        """Insert a batch of attempts and update the bookkeeping fields in one transaction."""
+        with self.conn:
+            max_id = self._insert(records)
+            meta = dict(fields or {})
+            meta["lastId"] = max(self.last_id(), last_id, max_id)
+            if records:
+                meta["lastSaved"] = datetime.now().isoformat()
+            self._put_meta(meta)
+
+    def replace_all(self, records: Iterable[Dict[str, Any]], last_id: Optional[int] = None,
+                    prepare: Optional[Callable[[Dict[str, Any]], None]] = None) -> int:
+        """Replace every stored attempt with the given records. Returns the number kept."""
+        with self.conn:
+            self.conn.execute("DELETE FROM attempts")
+            self.conn.execute("DELETE FROM daily")
+            max_id = self._insert(records, prepare)
+            self._put_meta({
+                "lastId": max(last_id or 0, max_id),
+                "lastSaved": datetime.now().isoformat(),
+                "syncCursor": None
+            })
+        return self.count()
+
+    def import_attempts_json(self, path: str,
+                             prepare: Optional[Callable[[Dict[str, Any]], None]] = None) -> int:
+        """Replace the stored attempts with the contents of a monolithic attempts.json."""
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, list):
+            data = {"attempts": data}
+        return self.replace_all(data.get("attempts", []), data.get("lastId", 0), prepare)
+
+    def records(self) -> Iterator[Dict[str, Any]]:
+        """Yield every stored attempt in insertion order."""
+        for (record,) in self.conn.execute("SELECT record FROM attempts ORDER BY seq"):
+            yield json.loads(record)
+
+    @staticmethod
+    def _where(since_ms: Optional[int] = None, until_ms: Optional[int] = None,
+               operation: Optional[str] = None, digits: Optional[int] = None,
+               after: Optional[Tuple[int, int]] = None) -> Tuple[str, List[Any]]:
+        """WHERE clause for timestamp-ordered queries; falsy operation/digits mean "no filter"."""
+        clauses, params = ["ts_ms IS NOT NULL"], []
+        if since_ms is not None:
+            clauses.append("ts_ms >= ?")
+            params.append(since_ms)
+        if until_ms is not None:
+            clauses.append("ts_ms < ?")
+            params.append(until_ms)
+        if operation:
+            clauses.append("operation = ?")
+            params.append(operation)
+        if digits:
+            clauses.append("digits = ?")
+            params.append(digits)
+        if after is not None:
+            clauses.append("(ts_ms, seq) > (?, ?)")
+            params.extend(after)
+        return " WHERE " + " AND ".join(clauses), params
+
+    def select(self, since_ms: Optional[int] = None, until_ms: Optional[int] = None,
+               operation: Optional[str] = None, digits: Optional[int] = None,
+               after: Optional[Tuple[int, int]] = None,
+               limit: Optional[int] = None) -> Tuple[List[Dict[str, Any]], Optional[Tuple[int, int]]]:
+        """
+        Attempts with since_ms <= timestamp < until_ms, ordered by (timestamp, seq).
+
+        Mirrors AttemptColumns.select but returns the records themselves; the
+        continuation position is a (ts_ms, seq) pair.
+        """
+        where, params = self._where(since_ms, until_ms, operation, digits, after)
+        sql = f"SELECT ts_ms, seq, record FROM attempts{where} ORDER BY ts_ms, seq"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit + 1)
+        rows = self.conn.execute(sql, params).fetchall()
+
+        next_after = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_after = (rows[-1][0], rows[-1][1])
+        return [json.loads(record) for _, _, record in rows], next_after
+
+    def chunk_correct(self, window: int) -> List[Tuple[int, int]]:
+        """(attempts, correct) for consecutive chunks of `window` attempts in insertion order."""
+        rows = self.conn.execute(
+            "SELECT (rn - 1) / ? AS chunk, COUNT(*), SUM(is_correct) FROM "
+            "(SELECT ROW_NUMBER() OVER (ORDER BY seq) AS rn, is_correct FROM attempts) "
+            "GROUP BY chunk ORDER BY chunk", (window,))
+        return [(count, correct) for _, count, correct in rows]
+
+    def recent(self, limit: int) -> List[Dict[str, Any]]:
+        """The `limit` newest attempts by timestamp, newest first."""
+        rows = self.conn.execute(
+            "SELECT record FROM attempts ORDER BY ts_ms DESC, seq DESC LIMIT ?", (limit,))
+        return [json.loads(record) for (record,) in rows]
+
+    def latest_timestamp(self) -> Tuple[int, Any]:
+        """Return (epoch ms, raw timestamp) of the newest attempt, or (0, "")."""
+        row = self.conn.execute(
+            "SELECT ts_ms, record FROM attempts WHERE ts_ms > 0 ORDER BY ts_ms DESC, seq LIMIT 1"
+        ).fetchone()
+        if row is None:
+            return 0, ""
+        return row[0], json.loads(row[1]).get("timestamp", "")
+
+    def group_totals(self, column: str, since_ms: Optional[int] = None, until_ms: Optional[int] = None,
+                     operation: Optional[str] = None, digits: Optional[int] = None) -> Dict[Any, List[float]]:
+        """Grouped [count, correct, timeSum, timeSqSum] over "operation" or "digits".
+
+        When a time range or filter is given, only timestamped attempts matching it are counted.
+        """
+        if column not in ("operation", "digits"):
+            raise ValueError(f"Cannot group attempts by {column}")
+        where, params = "", []
+        if since_ms is not None or until_ms is not None or operation or digits:
+            where, params = self._where(since_ms, until_ms, operation, digits)
+        rows = self.conn.execute(
+            f"SELECT {column}, COUNT(*), SUM(is_correct), TOTAL(time_taken), "
+            f"TOTAL(time_taken * time_taken) FROM attempts{where} GROUP BY {column}", params)
+        return {key: [count, correct, time_sum, time_sq_sum]
+                for key, count, correct, time_sum, time_sq_sum in rows}
+
+    def pair_stats(self, operation: Optional[str] = None,
+                   digits: Optional[int] = None) -> Dict[Tuple[int, int, Any], List[float]]:
+        """
+        Per operand pair [total, correct, timeSum, timeCount], like AttemptColumns.pair_stats.
+
+        Falsy operation/digits mean "no filter"; only non-zero times are counted
+        towards the time totals.
+        """
+        sql = ("SELECT num1, num2, op, COUNT(*), SUM(is_correct), "
+               "TOTAL(CASE WHEN time_taken != 0 THEN time_taken END), SUM(time_taken != 0) "
+               "FROM attempts WHERE num1 IS NOT NULL")
+        params: List[Any] = []
+        if operation:
+            sql += " AND operation = ?"
+            params.append(operation)
+        if digits:
+            sql += " AND digits = ?"
+            params.append(digits)
+        sql += " GROUP BY num1, num2, op ORDER BY MIN(seq)"
+        return {(n1, n2, op): [total, correct, time_sum, time_count]
+                for n1, n2, op, total, correct, time_sum, time_count in self.conn.execute(sql, params)}
+
+    def rebuild_daily(self) -> None:
+        """Recompute the daily rollup table from the attempts."""
+        days: Dict[str, List[float]] = {}
+        for ms, correct, time_taken in self.conn.execute(
+                "SELECT ts_ms, is_correct, time_taken FROM attempts WHERE ts_ms IS NOT NULL"):
+            acc = days.setdefault(local_day(ms), [0, 0, 0.0])
+            acc[0] += 1
+            acc[1] += correct
+            acc[2] += time_taken
+        with self.conn:
+            self.conn.execute("DELETE FROM daily")
+            self.conn.executemany(UPSERT_DAILY_SQL, [(day, *acc) for day, acc in days.items()])
+
+    def daily_rollup(self) -> Dict[str, List[float]]:
+        """[attempts, correct, totalTime] per local calendar date."""
+        rows = self.conn.execute("SELECT day, attempts, correct, total_time FROM daily ORDER BY day")
+        return {day: [attempts, correct, total_time] for day, attempts, correct, total_time in rows}
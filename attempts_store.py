@@ -0,0 +1,626 @@
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .write_behind import WriteBehind
+
+MANIFEST_NAME = "manifest.json"
+INDEX_NAME = "index.tsv"
+JOURNAL_NAME = "journal.jsonl"
+SEGMENT_PREFIX = "segment_"
+SEGMENT_SUFFIX = ".jsonl"
+
+# Segments are rolled over once they grow past this size so that no single
+# file has to be rewritten or re-read as a whole during normal operation.
+SEGMENT_MAX_BYTES = 512 * 1024
+
+# The journal is checkpointed into the log once it grows past this size
+JOURNAL_MAX_BYTES = 256 * 1024
+
+
+def attempt_fingerprint(record: Dict[str, Any]) -> str:
+    """Content hash identifying an attempt independently of its (reassignable) id."""
+    key = json.dumps([record.get("timestamp"), record.get("question"), record.get("userAnswer")],
+                     ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def _fsync_path(path: str) -> None:
+    """Flush a file's contents to stable storage."""
+    with open(path, "rb+") as f:
+        os.fsync(f.fileno())
+
+
+def _fsync_dir(path: str) -> None:
+    """Flush directory entries (renames, new files); not supported on every platform."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class AttemptLogStore:
+    """
+    Segmented, append-only storage for practice attempts.
+
+    Attempts are stored one JSON object per line in rolling segment files.
+    A small manifest keeps the segment list together with summary fields
+    (lastId, totalAttempts, lastSaved), so saving a batch only appends to the
+    active segment and rewrites the manifest.
+
+    An append-only index file keeps one "id<TAB>fingerprint" line per record,
+    letting id conflicts and re-sent attempts be detected without reading the
+    log itself.
+
+    Durability comes from a write-ahead journal: every appended batch is first
+    written to the journal as a single line and fsynced, then applied to the
+    segments, index and manifest without further fsyncs. A checkpoint makes
+    those files durable and empties the journal; `recover()` replays whatever
+    the journal still holds after a crash, skipping records already stored.
+
+    With a `WriteBehind` writer, `append()` and `update_manifest()` only update
+    the in-memory state and stage the records; the writer thread then journals
+    and applies everything staged in one go. Anything that reads the files
+    flushes the writer first.
+    """
+
+    def __init__(self, store_dir: str, writer: Optional[WriteBehind] = None):
+        self.store_dir = store_dir
+        self.manifest_path = os.path.join(store_dir, MANIFEST_NAME)
+        self.index_path = os.path.join(store_dir, INDEX_NAME)
+        self.journal_path = os.path.join(store_dir, JOURNAL_NAME)
+
+        os.makedirs(self.store_dir, exist_ok=True)
+
+        self.manifest: Dict[str, Any] = self._load_manifest()
+
+        # Loaded lazily from the index file on first use
+        self._ids: Optional[Set[Any]] = None
+        self._fingerprints: Optional[Set[str]] = None
+
+        # Segments appended to since the last checkpoint
+        self._dirty_segments: Set[str] = set()
+
+        self.writer = writer
+        # Guards the manifest and staged records shared with the writer thread
+        self.lock = threading.RLock()
+        self._staged: List[Dict[str, Any]] = []
+        self._manifest_dirty = False
+        # Why the last background write failed; its records stay staged for a retry
+        self.write_error: Optional[Exception] = None
+        # (mtime_ns, size) of the manifest as last written by this store
+        self.written_key: Optional[Tuple[int, int]] = None
+
+    def _default_manifest(self) -> Dict[str, Any]:
+        return {
+            "version": 1,
+            "lastId": 0,
+            "totalAttempts": 0,
+            "lastSaved": "",
+            "nextSegment": 1,
+            "segments": []
+        }
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        """Load the manifest, falling back to an empty one if missing or unreadable."""
+        manifest = self._default_manifest()
+        try:
+            if os.path.exists(self.manifest_path):
+                with open(self.manifest_path, "r", encoding="utf-8") as f:
+                    manifest.update(json.load(f))
+        except Exception as e:
+            print(f"Error loading attempts manifest: {e}")
+        return manifest
+
+    def reload(self) -> None:
+        """Re-read the manifest and drop the in-memory index after an outside change."""
+        self.flush()
+        self.manifest = self._load_manifest()
+        self._ids = None
+        self._fingerprints = None
+
+    def exists(self) -> bool:
+        """Whether a manifest has ever been written for this store."""
+        return os.path.exists(self.manifest_path)
+
+    @property
+    def index_loaded(self) -> bool:
+        return self._ids is not None
+
+    @property
+    def ids(self) -> Set[Any]:
+        self._ensure_index()
+        return self._ids
+
+    @property
+    def fingerprints(self) -> Set[str]:
+        self._ensure_index()
+        return self._fingerprints
+
+    def _ensure_index(self) -> None:
+        """Load the id/fingerprint index, rebuilding it if it is missing or stale."""
+        if self._ids is not None:
+            return
+
+        ids: Set[Any] = set()
+        fingerprints: Set[str] = set()
+        lines = 0
+        try:
+            if os.path.exists(self.index_path):
+                with open(self.index_path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        raw_id, _, fp = line.rstrip("\n").partition("\t")
+                        if not fp:
+                            continue
+                        ids.add(json.loads(raw_id))
+                        fingerprints.add(fp)
+                        lines += 1
+        except Exception as e:
+            print(f"Error loading attempts index: {e}")
+            lines = -1
+
+        if lines == self.manifest.get("totalAttempts", 0) and len(fingerprints) == lines:
+            self._ids, self._fingerprints = ids, fingerprints
+            return
+
+        # Index missing, torn or pointing at duplicates: repack the log, which
+        # drops duplicate content and writes a fresh index
+        print("Attempts index is stale, compacting the attempts log")
+        self.compact()
+
+    @staticmethod
+    def _index_line(record: Dict[str, Any]) -> str:
+        return f"{json.dumps(record.get('id'))}\t{attempt_fingerprint(record)}\n"
+
+    def _segment_path(self, name: str) -> str:
+        return os.path.join(self.store_dir, name)
+
+    def _new_segment(self) -> Dict[str, Any]:
+        """Register a new, empty segment in the manifest and return it."""
+        number = self.manifest.get("nextSegment", 1)
+        segment = {"name": f"{SEGMENT_PREFIX}{number:06d}{SEGMENT_SUFFIX}", "records": 0}
+        self.manifest["nextSegment"] = number + 1
+        self.manifest["segments"].append(segment)
+        return segment
+
+    def _active_segment(self) -> Dict[str, Any]:
+        """Return the segment new records should go to, rolling over when it is full."""
+        segments = self.manifest["segments"]
+        if segments:
+            active = segments[-1]
+            path = self._segment_path(active["name"])
+            if not os.path.exists(path) or os.path.getsize(path) < SEGMENT_MAX_BYTES:
+                return active
+        return self._new_segment()
+
+    @staticmethod
+    def _encode(record: Dict[str, Any]) -> str:
+        return json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+    def _atomic_write_manifest(self, durable: bool = False, text: Optional[str] = None) -> None:
+        """Write the manifest through a temp file so readers never see a partial file.
+
+        With `durable`, the temp file and the rename are fsynced as well. `text`
+        is a manifest already serialized under the lock.
+        """
+        if text is None:
+            text = json.dumps(self.manifest, indent=2, ensure_ascii=False)
+        temp_path = f"{self.manifest_path}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.write(text)
+                if durable:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(temp_path, self.manifest_path)
+            if durable:
+                _fsync_dir(self.store_dir)
+            st = os.stat(self.manifest_path)
+            self.written_key = (st.st_mtime_ns, st.st_size)
+        except Exception:
+            if os.path.exists(temp_path):
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+            raise
+
+    def update_manifest(self, fields: Dict[str, Any]) -> None:
+        """Merge extra bookkeeping fields into the manifest and persist it."""
+        with self.lock:
+            self.manifest.update(fields)
+            self._manifest_dirty = True
+        self._schedule(0)
+
+    @property
+    def pending(self) -> bool:
+        """Whether staged changes have not reached the files yet."""
+        if self.writer is None:
+            return False
+        with self.lock:
+            if self._staged or self._manifest_dirty:
+                return True
+        return self.writer.pending
+
+    def flush(self) -> None:
+        """Wait for the writer to apply everything staged so far.
+
+        Changes left staged by a failed write are retried.
+        """
+        if self.writer is None:
+            return
+        with self.lock:
+            retry = (self._staged or self._manifest_dirty) and not self.writer.pending
+        if retry:
+            self._schedule(0)
+        self.writer.flush()
+
+    def append(self, records: List[Dict[str, Any]], last_id: int,
+               fields: Optional[Dict[str, Any]] = None) -> None:
+        """Append a batch of records to the log and update the manifest.
+
+        The counts, index and extra manifest fields (e.g. the sync cursor) are
+        updated in memory right away. The batch is then journaled (one line, one
+        fsync) and applied, either immediately or by the writer thread together
+        with any other batches staged in the meantime.
+        """
+        if not records:
+            if fields:
+                self.update_manifest(fields)
+            return
+
+        self._ensure_index()
+        with self.lock:
+            for record in records:
+                self._ids.add(record.get("id"))
+                self._fingerprints.add(attempt_fingerprint(record))
+            self.manifest["lastId"] = max(self.manifest.get("lastId", 0), last_id)
+            self.manifest["totalAttempts"] = self.manifest.get("totalAttempts", 0) + len(records)
+            self.manifest["lastSaved"] = datetime.now().isoformat()
+            if fields:
+                self.manifest.update(fields)
+            self._staged.extend(records)
+            self._manifest_dirty = True
+        self._schedule(len(records))
+
+    def _schedule(self, weight: int) -> None:
+        if self.writer is None:
+            self._drain()
+        else:
+            self.writer.submit(self.store_dir, self._drain, weight)
+
+    def _drain(self) -> None:
+        """Journal and apply the staged records, then write the manifest.
+
+        The journal fsync runs without holding the lock, so staging more records
+        never waits on the disk. If any write fails the records go back to the
+        front of the staged list (the log is rolled back first) and the error
+        is raised, so the next flush retries them.
+        """
+        with self.lock:
+            records, self._staged = self._staged, []
+            if not records and not self._manifest_dirty:
+                return
+            last_id = self.manifest.get("lastId", 0)
+
+        try:
+            if records:
+                # A batch journaled again on retry is harmless: recovery skips stored records
+                self._journal(records, last_id)
+
+            with self.lock:
+                if records:
+                    self._write_records(records)
+                    records = []
+                self._manifest_dirty = False
+                text = json.dumps(self.manifest, indent=2, ensure_ascii=False)
+            self._atomic_write_manifest(text=text)
+        except Exception as e:
+            with self.lock:
+                self._staged[:0] = records
+                self._manifest_dirty = True
+                self.write_error = e
+            raise
+        self.write_error = None
+
+        if os.path.exists(self.journal_path) and os.path.getsize(self.journal_path) >= JOURNAL_MAX_BYTES:
+            with self.lock:
+                self._checkpoint()
+
+    def _journal(self, records: List[Dict[str, Any]], last_id: int) -> None:
+        """Durably record a batch before it touches the log."""
+        entry = json.dumps({"lastId": last_id, "records": records},
+                           ensure_ascii=False, separators=(",", ":"))
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write(entry + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    @staticmethod
+    def _ends_torn(path: str) -> bool:
+        """Whether a segment file ends without a newline (an interrupted write)."""
+        with open(path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) != b"\n"
+
+    def _read_journal(self) -> Iterator[Dict[str, Any]]:
+        """Yield journaled batches, skipping a torn trailing line."""
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(entry, dict) and isinstance(entry.get("records"), list):
+                    yield entry
+
+    def _write_records(self, records: List[Dict[str, Any]]) -> None:
+        """Write a batch to the segments and the index, all or nothing."""
+        segments = self.manifest["segments"]
+        # Everything the batch can touch: the last segment, new segments and the index
+        snapshot = {
+            "count": len(segments),
+            "nextSegment": self.manifest.get("nextSegment", 1),
+            "last": dict(segments[-1]) if segments else None,
+            "sizes": {path: os.path.getsize(path) if os.path.exists(path) else None
+                      for path in [self.index_path] + [self._segment_path(s["name"]) for s in segments[-1:]]}
+        }
+        try:
+            self._append_records(records)
+        except Exception:
+            self._roll_back(snapshot)
+            raise
+
+    def _roll_back(self, snapshot: Dict[str, Any]) -> None:
+        """Undo a partly written batch so it can be written again without duplicates."""
+        segments = self.manifest["segments"]
+        for segment in segments[snapshot["count"]:]:
+            path = self._segment_path(segment["name"])
+            if os.path.exists(path):
+                os.remove(path)
+        del segments[snapshot["count"]:]
+        self.manifest["nextSegment"] = snapshot["nextSegment"]
+        if snapshot["last"] is not None:
+            segments[-1].update(snapshot["last"])
+
+        for path, size in snapshot["sizes"].items():
+            if size is not None:
+                os.truncate(path, size)
+            elif os.path.exists(path):
+                os.remove(path)
+
+    def _append_records(self, records: List[Dict[str, Any]]) -> None:
+        """Append a batch to the segments and the index (see _write_records)."""
+        segment = self._active_segment()
+        path = self._segment_path(segment["name"])
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+
+        f = open(path, "a", encoding="utf-8")
+        if size and self._ends_torn(path):
+            # Keep the next record off the torn line an interrupted write left behind
+            f.write("\n")
+            size += 1
+        try:
+            for record in records:
+                line = self._encode(record)
+                if size >= SEGMENT_MAX_BYTES:
+                    f.close()
+                    segment = self._new_segment()
+                    path = self._segment_path(segment["name"])
+                    size = 0
+                    f = open(path, "a", encoding="utf-8")
+                f.write(line)
+                size += len(line.encode("utf-8"))
+                segment["records"] += 1
+                self._dirty_segments.add(segment["name"])
+        finally:
+            f.close()
+
+        with open(self.index_path, "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(self._index_line(record))
+                if self._ids is not None:
+                    self._ids.add(record.get("id"))
+                    self._fingerprints.add(attempt_fingerprint(record))
+
+    def checkpoint(self) -> None:
+        """Make every applied batch durable in the log and empty the journal.
+
+        Raises OSError if staged changes still cannot be written; they stay
+        staged (and journaled where that succeeded) for a later retry.
+        """
+        self.flush()
+        with self.lock:
+            if self.write_error is not None and (self._staged or self._manifest_dirty):
+                raise OSError(f"Attempts in {self.store_dir} could not be written: {self.write_error}")
+            self._checkpoint()
+
+    def _checkpoint(self) -> None:
+        if not os.path.exists(self.journal_path) and not self._dirty_segments:
+            return
+
+        for name in self._dirty_segments:
+            path = self._segment_path(name)
+            if os.path.exists(path):
+                _fsync_path(path)
+        if os.path.exists(self.index_path):
+            _fsync_path(self.index_path)
+        self._atomic_write_manifest(durable=True)
+
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+            _fsync_dir(self.store_dir)
+        self._dirty_segments.clear()
+
+    def recover(self) -> int:
+        """Replay journaled batches missing from the log, then checkpoint.
+
+        Records whose fingerprint is already stored are skipped, so replaying a
+        batch that was fully or partly applied before a crash is harmless.
+        Returns the number of records restored.
+        """
+        entries = list(self._read_journal())
+        if not entries and not os.path.exists(self.journal_path):
+            return 0
+
+        fingerprints = self.fingerprints
+        last_id = self.manifest.get("lastId", 0)
+        missing: List[Dict[str, Any]] = []
+        seen: Set[str] = set()
+        for entry in entries:
+            last_id = max(last_id, entry.get("lastId", 0))
+            for record in entry["records"]:
+                fp = attempt_fingerprint(record)
+                if fp in fingerprints or fp in seen:
+                    continue
+                seen.add(fp)
+                missing.append(record)
+
+        if missing:
+            self._write_records(missing)
+            self.manifest["lastId"] = max(self.manifest.get("lastId", 0), last_id)
+            self.manifest["totalAttempts"] = self.manifest.get("totalAttempts", 0) + len(missing)
+            self.manifest["lastSaved"] = datetime.now().isoformat()
+            self._atomic_write_manifest()
+        self.checkpoint()
+        return len(missing)
+
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        """Yield every stored record in insertion order, skipping unreadable lines."""
+        self.flush()
+        for segment in list(self.manifest["segments"]):
+            path = self._segment_path(segment["name"])
+            if not os.path.exists(path):
+                print(f"Attempts segment missing: {path}")
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # A torn trailing line from an interrupted write
+                        continue
+                    if isinstance(record, dict):
+                        yield record
+
+    def read_all(self) -> Tuple[List[Dict[str, Any]], bool]:
+        """Return all records and whether the log disagrees with the manifest."""
+        records = list(self.iter_records())
+        damaged = len(records) != self.manifest.get("totalAttempts", 0)
+        return records, damaged
+
+    def rewrite(self, records: Iterable[Dict[str, Any]], last_id: Optional[int] = None,
+                prepare: Optional[Callable[[Dict[str, Any]], None]] = None) -> int:
+        """
+        Replace the whole log with the given records.
+
+        Records whose content fingerprint was already seen are dropped, and the
+        id/fingerprint index is rebuilt alongside. `prepare` may fill in derived
+        fields on each record before it is written. New segments are written first
+        and the manifest is swapped atomically afterwards, so an interruption
+        leaves either the old or the new log. Returns the number of records written.
+        """
+        self.flush()
+        old_segments = self.manifest["segments"]
+        self.manifest["segments"] = []
+
+        ids: Set[Any] = set()
+        fingerprints: Set[str] = set()
+        index_tmp = f"{self.index_path}.tmp"
+        index_file = open(index_tmp, "w", encoding="utf-8")
+
+        count = 0
+        max_id = 0
+        segment = None
+        f = None
+        size = 0
+        written: List[str] = []
+        try:
+            for record in records:
+                if not isinstance(record, dict):
+                    continue
+                fp = attempt_fingerprint(record)
+                if fp in fingerprints:
+                    continue
+                if prepare is not None:
+                    prepare(record)
+                line = self._encode(record)
+                if f is None or size >= SEGMENT_MAX_BYTES:
+                    if f is not None:
+                        f.close()
+                    segment = self._new_segment()
+                    f = open(self._segment_path(segment["name"]), "w", encoding="utf-8")
+                    written.append(segment["name"])
+                    size = 0
+                f.write(line)
+                size += len(line.encode("utf-8"))
+                segment["records"] += 1
+                count += 1
+                if isinstance(record.get("id"), int):
+                    max_id = max(max_id, record["id"])
+
+                index_file.write(self._index_line(record))
+                ids.add(record.get("id"))
+                fingerprints.add(fp)
+        except Exception:
+            # Keep serving the old log; the half-written segments are orphans
+            self.manifest["segments"] = old_segments
+            raise
+        finally:
+            if f is not None:
+                f.close()
+            index_file.close()
+
+        # The new files must be on disk before the manifest points at them
+        for name in written:
+            _fsync_path(self._segment_path(name))
+        _fsync_path(index_tmp)
+        os.replace(index_tmp, self.index_path)
+        self._ids, self._fingerprints = ids, fingerprints
+        self._dirty_segments.clear()
+
+        self.manifest["lastId"] = max(last_id or 0, max_id)
+        self.manifest["totalAttempts"] = count
+        self.manifest["lastSaved"] = datetime.now().isoformat()
+        self._atomic_write_manifest(durable=True)
+
+        for segment in old_segments:
+            try:
+                os.remove(self._segment_path(segment["name"]))
+            except OSError:
+                pass
+        return count
+
+    def compact(self, prepare: Optional[Callable[[Dict[str, Any]], None]] = None) -> int:
+        """
+        Rewrite the log into densely packed segments.
+
+        Drops unreadable lines left behind by interrupted writes and duplicate
+        attempts, and brings the manifest counts and the index back in line
+        with the data actually on disk.
+        """
+        records = list(self.iter_records())
+        return self.rewrite(records, self.manifest.get("lastId", 0), prepare)
+
+    def import_monolithic(self, path: str,
+                          prepare: Optional[Callable[[Dict[str, Any]], None]] = None) -> int:
+        """Replace the log with the contents of a legacy single-file attempts.json."""
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, list):
+            data = {"attempts": data}
+        return self.rewrite(data.get("attempts", []), data.get("lastId", 0), prepare)
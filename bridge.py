@@ -1,8 +1,79 @@
-from aqt.qt import QObject, pyqtSignal, QWebChannel, pyqtSlot
+from aqt.qt import QObject, pyqtSignal, QWebChannel, pyqtSlot, Qt
 from aqt.utils import showInfo, askUser, tooltip
 from aqt import mw
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import json
 import os
+import shutil
+import threading
+
+from . import json_codec
+
+# Where a message type's handler runs
+MAIN = 'main'              # touches Qt/Anki objects: inline on the GUI thread
+SERIAL = 'serial'          # shares manager state: on the worker lane, one at a time in arrival order
+CONCURRENT = 'concurrent'  # safe to overlap with any other handler: on the worker pool
+
+# Message type -> (handler method, where it runs)
+MESSAGE_ROUTES = {
+    'hello': ('_handle_hello', MAIN),
+    'get_cards': ('_handle_get_cards', MAIN),
+    'show_info': ('_handle_show_info', MAIN),
+    'save_attempts': ('_handle_save_attempts', SERIAL),
+    'get_sync_cursor': ('_handle_get_sync_cursor', SERIAL),
+    'load_attempts': ('_handle_load_attempts', SERIAL),
+    'get_statistics': ('_handle_get_statistics', SERIAL),
+    'get_chart_data': ('_handle_get_chart_data', SERIAL),
+    'load_levels': ('_handle_load_levels', SERIAL),
+    'get_level': ('_handle_get_level', SERIAL),
+    'complete_level': ('_handle_complete_level', SERIAL),
+    'get_level_progress': ('_handle_get_level_progress', SERIAL),
+    'save_settings': ('_handle_save_settings', SERIAL),
+    'load_settings': ('_handle_load_settings', CONCURRENT),
+    'get_weaknesses': ('_handle_get_weaknesses', SERIAL),
+    'export_data': ('_handle_export_data', SERIAL),
+    'import_data': ('_handle_import_data', MAIN),
+}
+
+# Message types where a newer request supersedes older ones still queued or
+# running, even without an explicit coalesceKey (latest wins)
+LATEST_WINS = {'get_weaknesses', 'get_statistics', 'get_chart_data'}
+
+# Message types whose reply depends only on the payload and on the data of one
+# manager; their serialized replies are reused until that manager's data_version() changes
+CACHED_REPLIES = {
+    'get_statistics': 'attempts',
+    'get_chart_data': 'attempts',
+    'get_weaknesses': 'attempts',
+    'load_levels': 'levels',
+    'get_level': 'levels',
+    'get_level_progress': 'levels',
+}
+
+# Serialized replies kept for reuse, and the largest one worth keeping
+REPLY_CACHE_SIZE = 32
+REPLY_CACHE_MAX_CHARS = 1024 * 1024
+
+# Streamed replies are cut into frames of at most about this many characters
+STREAM_FRAME_CHARS = 256 * 1024
+
+# Frames a streaming worker may have waiting for the GUI thread at once
+STREAM_WINDOW = 4
+
+
+class CancelToken:
+    """Cancellation flag of one request running on a worker thread"""
+    
+    def __init__(self, msg_type, request_id=None, key=None):
+        self.msg_type = msg_type
+        self.request_id = request_id
+        self.key = key
+        self.cancelled = False
+    
+    def cancel(self):
+        self.cancelled = True
+
 
 class Bridge(QObject):
     """Bridge for communication between Python and JavaScript"""
@@ -13,61 +84,371 @@ class Bridge(QObject):
         self.channel.registerObject("pybridge", self)
         self.attempts_manager = attempts_manager
         self.levels_manager = levels_manager
+        
+        # Heavy handlers run off the GUI thread. The managers are not thread-safe,
+        # so everything touching them shares a single worker thread.
+        self._serial = ThreadPoolExecutor(max_workers=1, thread_name_prefix="MathDrillBridge")
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="MathDrillBridgePool")
+        # Worker replies hop back to the GUI thread before reaching JavaScript
+        self._workerReply.connect(self._deliver, Qt.ConnectionType.QueuedConnection)
+        self._workerFrame.connect(self._deliver_frame, Qt.ConnectionType.QueuedConnection)
+        self._frame_slots = threading.Semaphore(STREAM_WINDOW)
+        self._closing = False
+        
+        # Cancellation tokens of worker requests, by requestId and by coalescing key
+        self._tokens = {}
+        self._latest = {}
+        self._tokens_lock = threading.Lock()
+        
+        # (message type, data version, payload) -> serialized reply
+        self._replies = OrderedDict()
+        self._replies_lock = threading.Lock()
     
     # Signals to JavaScript
     messageReceived = pyqtSignal(str)
     
+    # Replies and stream frames produced on worker threads
+    _workerReply = pyqtSignal(str)
+    _workerFrame = pyqtSignal(str)
+    
     @pyqtSlot(str)
     def sendMessage(self, message):
-        """Receive message from JavaScript"""
+        """Receive message from JavaScript
+        
+        Messages are {type, payload} envelopes. An optional client-generated
+        requestId is echoed in the reply (errors included), so callers can
+        match replies to requests while several are in flight. A 'batch'
+        message carries several such envelopes and gets one combined reply.
+        
+        Worker requests can be dropped before they finish: a 'cancel' message
+        names the requestId to cancel, and a request with a coalesceKey (or of
+        a LATEST_WINS type) supersedes older requests of the same type and key.
+        Dropped requests get a 'cancelled' reply instead of their result.
+        
+        Replies of CACHED_REPLIES types carry the data version they were built
+        from. A request whose ifVersion still matches it gets a small
+        'not_modified' reply instead of the payload.
+        
+        With stream set (and a requestId), a worker reply is sent as
+        'stream_chunk' frames holding consecutive slices of its JSON text,
+        numbered by seq, followed by a 'stream_end' frame.
+        """
+        request_id = None
         try:
-            data = json.loads(message)
+            data = json_codec.loads(message)
             msg_type = data.get('type', '')
             payload = data.get('payload', {})
+            request_id = data.get('requestId')
             
             print(f"DEBUG: Received message type: {msg_type}")
             
-            if msg_type == 'hello':
-                self._handle_hello(payload)
-            elif msg_type == 'get_cards':
-                self._handle_get_cards(payload)
-            elif msg_type == 'show_info':
-                self._handle_show_info(payload)
-            elif msg_type == 'save_attempts':
-                self._handle_save_attempts(payload)
-            elif msg_type == 'load_attempts':
-                self._handle_load_attempts(payload)
-            elif msg_type == 'get_statistics':
-                self._handle_get_statistics(payload)
-            elif msg_type == 'load_levels':
-                self._handle_load_levels(payload)
-            elif msg_type == 'get_level':
-                self._handle_get_level(payload)
-            elif msg_type == 'complete_level':
-                self._handle_complete_level(payload)
-            elif msg_type == 'get_level_progress':
-                self._handle_get_level_progress(payload)
-            elif msg_type == 'save_settings':
-                self._handle_save_settings(payload)
-            elif msg_type == 'load_settings':
-                self._handle_load_settings(payload)
-            elif msg_type == 'get_weaknesses':
-                self._handle_get_weaknesses(payload)
-            elif msg_type == 'export_data':
-                self.export_data()
-            elif msg_type == 'import_data':
-                self.import_data(message)
-            else:
-                self.messageReceived.emit(json.dumps({
+            if msg_type == 'batch':
+                self._handle_batch(payload, request_id)
+                return
+            if msg_type == 'cancel':
+                self._cancel(payload.get('requestId'))
+                return
+            
+            route = MESSAGE_ROUTES.get(msg_type)
+            if route is None:
+                self.messageReceived.emit(json_codec.dumps(self._with_request_id({
                     'type': 'error',
                     'payload': {'message': f'Unknown message type: {msg_type}'}
-                }))
+                }, request_id)))
+                return
+            
+            handler, mode = route
+            if_version = data.get('ifVersion')
+            if mode == MAIN:
+                self._deliver(self._reply_text(msg_type, handler, payload, request_id, if_version=if_version))
+            else:
+                executor = self._serial if mode == SERIAL else self._pool
+                token = self._track(msg_type, request_id, data.get('coalesceKey'))
+                stream = bool(data.get('stream')) and request_id is not None
+                executor.submit(self._run_in_worker, msg_type, handler, payload, request_id, token, stream,
+                                if_version)
                 
         except Exception as e:
-            self.messageReceived.emit(json.dumps({
+            self.messageReceived.emit(json_codec.dumps(self._with_request_id({
                 'type': 'error',
                 'payload': {'message': f'Error processing message: {str(e)}'}
-            }))
+            }, request_id)))
+    
+    @staticmethod
+    def _with_request_id(response, request_id):
+        if request_id is not None:
+            response['requestId'] = request_id
+        return response
+    
+    @staticmethod
+    def _with_request_id_text(text, request_id):
+        """Add requestId to an already serialized (non-empty) reply object"""
+        if request_id is None:
+            return text
+        return f'{text[:-1]}, "requestId": {json_codec.dumps(request_id)}}}'
+    
+    def _call_handler(self, handler, payload, request_id=None):
+        """Run a handler and return its reply; unexpected exceptions become an error reply"""
+        try:
+            response = getattr(self, handler)(payload)
+        except Exception as e:
+            response = {
+                'type': 'error',
+                'payload': {'message': f'Error processing message: {str(e)}'}
+            }
+        return self._with_request_id(response, request_id)
+    
+    def _reply_text(self, msg_type, handler, payload, request_id=None, token=None, stream=False,
+                    if_version=None):
+        """Run a handler and return its serialized reply, or None if the reply was streamed
+        
+        Replies of CACHED_REPLIES types are served from the reply cache while
+        the data they were built from is unchanged, or answered with
+        'not_modified' when the client already holds that version.
+        """
+        version = self._data_version(msg_type)
+        if version is not None and if_version == version:
+            return json_codec.dumps(self._with_request_id({
+                'type': 'not_modified',
+                'requestType': msg_type,
+                'version': version
+            }, request_id))
+        
+        key = self._reply_key(msg_type, version, payload)
+        text = self._cached_reply(key)
+        if text is None:
+            response = self._call_handler(handler, payload)
+            if token is not None and token.cancelled:
+                # Superseded while running: skip serializing a result nobody wants
+                return json_codec.dumps(self._cancelled_reply(token))
+            if response.get('type') == 'error':
+                return json_codec.dumps(self._with_request_id(response, request_id))
+            if stream and key is None:
+                # Encode piece by piece so the whole reply string never exists
+                pieces = json.JSONEncoder().iterencode(self._with_request_id(response, request_id))
+                self._stream(pieces, request_id, token)
+                return None
+            if version is not None:
+                response['version'] = version
+            text = json_codec.dumps(response)
+            self._cache_reply(key, text)
+        
+        text = self._with_request_id_text(text, request_id)
+        if stream:
+            self._stream((text[i:i + STREAM_FRAME_CHARS] for i in range(0, len(text), STREAM_FRAME_CHARS)),
+                         request_id, token)
+            return None
+        return text
+    
+    def _data_version(self, msg_type):
+        """Current version of the data a CACHED_REPLIES type reads, None for other types"""
+        source = CACHED_REPLIES.get(msg_type)
+        manager = self.attempts_manager if source == 'attempts' else self.levels_manager
+        if source is None or manager is None:
+            return None
+        return manager.data_version()
+    
+    def _reply_key(self, msg_type, version, payload):
+        """Reply cache key of a request, or None if its reply is not cacheable"""
+        if version is None:
+            return None
+        try:
+            params = json.dumps(payload, sort_keys=True)
+        except (TypeError, ValueError):
+            return None
+        return (msg_type, version, params)
+    
+    def _cached_reply(self, key):
+        if key is None:
+            return None
+        with self._replies_lock:
+            text = self._replies.get(key)
+            if text is not None:
+                self._replies.move_to_end(key)
+            return text
+    
+    def _cache_reply(self, key, text):
+        if key is None or len(text) > REPLY_CACHE_MAX_CHARS:
+            return
+        with self._replies_lock:
+            self._replies[key] = text
+            while len(self._replies) > REPLY_CACHE_SIZE:
+                self._replies.popitem(last=False)
+    
+    def _run_in_worker(self, msg_type, handler, payload, request_id=None, token=None, stream=False,
+                       if_version=None):
+        """Run a handler on a worker thread unless its request was cancelled or superseded"""
+        try:
+            if token is not None and token.cancelled:
+                text = json_codec.dumps(self._cancelled_reply(token))
+            else:
+                text = self._reply_text(msg_type, handler, payload, request_id, token, stream, if_version)
+        finally:
+            self._release(token)
+        if text is not None:
+            self._workerReply.emit(text)
+    
+    def _stream(self, pieces, request_id, token=None):
+        """Send a reply's JSON text as bounded 'stream_chunk' frames and a closing 'stream_end' frame
+        
+        The text arrives in pieces, so neither the whole reply string (when it
+        is encoded incrementally) nor more than STREAM_WINDOW frames exist at
+        any time.
+        """
+        seq = 0
+        parts = []
+        size = 0
+        total = 0
+        for piece in pieces:
+            parts.append(piece)
+            size += len(piece)
+            if size < STREAM_FRAME_CHARS:
+                continue
+            if token is not None and token.cancelled:
+                self._emit_frame(self._cancelled_reply(token))
+                return
+            self._emit_frame({'type': 'stream_chunk', 'requestId': request_id, 'seq': seq, 'data': ''.join(parts)})
+            seq += 1
+            total += size
+            parts = []
+            size = 0
+        if parts:
+            self._emit_frame({'type': 'stream_chunk', 'requestId': request_id, 'seq': seq, 'data': ''.join(parts)})
+            seq += 1
+            total += size
+        self._emit_frame({'type': 'stream_end', 'requestId': request_id, 'frames': seq, 'chars': total})
+    
+    def _emit_frame(self, frame):
+        # Wait for the GUI thread to pass earlier frames on (unless the dialog is closing)
+        while not self._frame_slots.acquire(timeout=0.1):
+            if self._closing:
+                break
+        self._workerFrame.emit(json_codec.dumps(frame))
+    
+    def _track(self, msg_type, request_id, coalesce_key):
+        """Create the token of a worker request, cancelling the one it supersedes"""
+        key = None
+        if coalesce_key is not None:
+            key = (msg_type, str(coalesce_key))
+        elif msg_type in LATEST_WINS:
+            key = (msg_type, None)
+        if key is None and request_id is None:
+            return None
+        
+        token = CancelToken(msg_type, request_id, key)
+        with self._tokens_lock:
+            if key is not None:
+                previous = self._latest.get(key)
+                if previous is not None:
+                    previous.cancel()
+                self._latest[key] = token
+            if request_id is not None:
+                self._tokens[request_id] = token
+        return token
+    
+    def _release(self, token):
+        if token is None:
+            return
+        with self._tokens_lock:
+            if token.request_id is not None and self._tokens.get(token.request_id) is token:
+                del self._tokens[token.request_id]
+            if token.key is not None and self._latest.get(token.key) is token:
+                del self._latest[token.key]
+    
+    def _cancel(self, request_id):
+        """Handle a cancel message; unknown or finished requests are ignored"""
+        with self._tokens_lock:
+            token = self._tokens.get(request_id)
+        if token is not None:
+            token.cancel()
+    
+    def _cancelled_reply(self, token):
+        return self._with_request_id({
+            'type': 'cancelled',
+            'payload': {
+                'requestType': token.msg_type,
+                'message': f'{token.msg_type} request was cancelled or superseded'
+            }
+        }, token.request_id)
+    
+    def _handle_batch(self, payload, request_id):
+        """Run the sub-requests of a batch message and reply once with all their responses
+        
+        Sub-requests keep their own routing: GUI-thread handlers run here, serial
+        ones run back to back as a single job on the worker lane, and concurrent
+        ones run in parallel on the pool. The 'batch_response' lists the replies
+        in request order.
+        """
+        requests = payload.get('requests') or []
+        # Sub-replies are kept serialized and spliced into the combined reply
+        replies = [None] * len(requests)
+        remaining = [len(requests)]
+        lock = threading.Lock()
+        
+        def batch_text():
+            text = '{"type": "batch_response", "payload": {"responses": [' + ', '.join(replies) + ']}}'
+            return self._with_request_id_text(text, request_id)
+        
+        def finish(index, reply_text):
+            replies[index] = reply_text
+            with lock:
+                remaining[0] -= 1
+                done = remaining[0] == 0
+            if done:
+                self._workerReply.emit(batch_text())
+        
+        if not requests:
+            self._deliver(batch_text())
+            return
+        
+        serial = []
+        for index, request in enumerate(requests):
+            if not isinstance(request, dict):
+                request = {}
+            sub_type = request.get('type', '')
+            sub_payload = request.get('payload', {})
+            sub_id = request.get('requestId')
+            sub_version = request.get('ifVersion')
+            route = MESSAGE_ROUTES.get(sub_type)
+            if route is None:
+                finish(index, json_codec.dumps(self._with_request_id({
+                    'type': 'error',
+                    'payload': {'message': f'Unknown message type: {sub_type}'}
+                }, sub_id)))
+                continue
+            
+            handler, mode = route
+            if mode == MAIN:
+                finish(index, self._reply_text(sub_type, handler, sub_payload, sub_id, if_version=sub_version))
+            elif mode == SERIAL:
+                serial.append((index, sub_type, handler, sub_payload, sub_id, sub_version))
+            else:
+                self._pool.submit(lambda i=index, t=sub_type, h=handler, p=sub_payload, r=sub_id, v=sub_version:
+                                  finish(i, self._reply_text(t, h, p, r, if_version=v)))
+        
+        if serial:
+            def run_serial():
+                for index, sub_type, handler, sub_payload, sub_id, sub_version in serial:
+                    finish(index, self._reply_text(sub_type, handler, sub_payload, sub_id,
+                                                   if_version=sub_version))
+            self._serial.submit(run_serial)
+    
+    @pyqtSlot(str)
+    def _deliver(self, response_json):
+        """Send a serialized reply to JavaScript (always on the GUI thread)"""
+        self.messageReceived.emit(response_json)
+    
+    @pyqtSlot(str)
+    def _deliver_frame(self, frame_json):
+        self.messageReceived.emit(frame_json)
+        self._frame_slots.release()
+    
+    def shutdown(self):
+        """Wait for running handlers to finish; called when the dialog closes"""
+        # Streaming workers must not wait for frame slots the GUI thread can no longer free
+        self._closing = True
+        self._serial.shutdown(wait=True)
+        self._pool.shutdown(wait=True)
     
     def _handle_hello(self, payload):
         """Handle hello message from JS"""
@@ -79,7 +460,7 @@ class Bridge(QObject):
                 'timestamp': str(mw.col.time.time())
             }
         }
-        self.messageReceived.emit(json.dumps(response))
+        return response
     
     def _handle_get_cards(self, payload):
         """Handle get cards request"""
@@ -93,7 +474,7 @@ class Bridge(QObject):
                     'message': f'Found {card_count} cards in collection'
                 }
             }
-            self.messageReceived.emit(json.dumps(response))
+            return response
         except Exception as e:
             response = {
                 'type': 'error',
@@ -101,7 +482,7 @@ class Bridge(QObject):
                     'message': f'Error getting cards: {str(e)}'
                 }
             }
-            self.messageReceived.emit(json.dumps(response))
+            return response
     
     def _handle_show_info(self, payload):
         """Handle show info request"""
@@ -114,7 +495,7 @@ class Bridge(QObject):
                 'message': 'Info dialog shown successfully'
             }
         }
-        self.messageReceived.emit(json.dumps(response))
+        return response
     
     def _handle_save_attempts(self, payload):
         """Handle save attempts request"""
@@ -129,7 +510,7 @@ class Bridge(QObject):
                 'type': 'save_attempts_response',
                 'payload': result
             }
-            self.messageReceived.emit(json.dumps(response))
+            return response
         except Exception as e:
             response = {
                 'type': 'error',
@@ -137,7 +518,39 @@ class Bridge(QObject):
                     'message': f'Error saving attempts: {str(e)}'
                 }
             }
-            self.messageReceived.emit(json.dumps(response))
+            return response
+    
+    def _handle_get_sync_cursor(self, payload):
+        """Handle sync cursor request (high-water mark of attempts already stored)"""
+        try:
+            if not self.attempts_manager:
+                raise Exception('Attempts manager not initialized')
+            
+            cursor = self.attempts_manager.get_sync_cursor()
+            
+            response = {
+                'type': 'sync_cursor_response',
+                'payload': {
+                    'cursor': cursor,
+                    'success': True
+                }
+            }
+            return response
+        except Exception as e:
+            response = {
+                'type': 'error',
+                'payload': {
+                    'message': f'Error getting sync cursor: {str(e)}'
+                }
+            }
+            return response
+    
+    def _attempt_query(self, payload):
+        """Extract since/until/operation/digits/limit/cursor attempt query parameters"""
+        query = {key: payload.get(key) for key in ('since', 'until', 'operation', 'digits', 'cursor')}
+        if payload.get('limit') is not None:
+            query['limit'] = int(payload['limit'])
+        return query
     
     def _handle_load_attempts(self, payload):
         """Handle load attempts request"""
@@ -145,13 +558,13 @@ class Bridge(QObject):
             if not self.attempts_manager:
                 raise Exception('Attempts manager not initialized')
             
-            data = self.attempts_manager.load_attempts()
+            data = self.attempts_manager.load_attempts(**self._attempt_query(payload))
             
             response = {
                 'type': 'load_attempts_response',
                 'payload': data
             }
-            self.messageReceived.emit(json.dumps(response))
+            return response
         except Exception as e:
             response = {
                 'type': 'error',
@@ -159,7 +572,7 @@ class Bridge(QObject):
                     'message': f'Error loading attempts: {str(e)}'
                 }
             }
-            self.messageReceived.emit(json.dumps(response))
+            return response
     
     def _handle_get_weaknesses(self, payload):
         """Handle get weaknesses request"""
@@ -179,7 +592,7 @@ class Bridge(QObject):
                     'success': True
                 }
             }
-            self.messageReceived.emit(json.dumps(response))
+            return response
         except Exception as e:
             response = {
                 'type': 'error',
@@ -187,7 +600,7 @@ class Bridge(QObject):
                     'message': f'Error getting weaknesses: {str(e)}'
                 }
             }
-            self.messageReceived.emit(json.dumps(response))
+            return response
 
     def _handle_get_statistics(self, payload):
         """Handle get statistics request"""
@@ -195,13 +608,16 @@ class Bridge(QObject):
             if not self.attempts_manager:
                 raise Exception('Attempts manager not initialized')
             
-            stats = self.attempts_manager.get_attempt_statistics()
+            # Raw attempts are only shipped when explicitly asked for
+            stats = self.attempts_manager.get_attempt_statistics(
+                include_attempts=bool(payload.get('includeAttempts', False)),
+                **self._attempt_query(payload))
             
             response = {
                 'type': 'statistics_response',
                 'payload': stats
             }
-            self.messageReceived.emit(json.dumps(response))
+            return response
         except Exception as e:
             response = {
                 'type': 'error',
@@ -209,32 +625,67 @@ class Bridge(QObject):
                     'message': f'Error getting statistics: {str(e)}'
                 }
             }
-            self.messageReceived.emit(json.dumps(response))
+            return response
+
+    def _handle_get_chart_data(self, payload):
+        """Handle chart data request (chart-ready series for the analytics page)"""
+        try:
+            if not self.attempts_manager:
+                raise Exception('Attempts manager not initialized')
+            
+            chart_data = self.attempts_manager.get_chart_data(
+                buckets=max(1, int(payload.get('buckets', 10))),
+                days=max(1, min(366, int(payload.get('days', 7)))),
+                heatmap_days=max(1, min(3660, int(payload.get('heatmapDays', 364)))),
+                recent=max(0, min(100, int(payload.get('recent', 10))))
+            )
+            
+            response = {
+                'type': 'chart_data_response',
+                'payload': dict(chart_data, success=True)
+            }
+            return response
+        except Exception as e:
+            response = {
+                'type': 'error',
+                'payload': {
+                    'message': f'Error getting chart data: {str(e)}'
+                }
+            }
+            return response
     
     def _handle_load_levels(self, payload):
-        """Handle load all levels request"""
+        """Handle load all levels request
+        
+        With sinceVersion (the version of a previous reply) only the levels
+        changed since then are sent, flagged with delta: true, unless changes
+        that old are no longer known.
+        """
         try:
             if not self.levels_manager:
                 raise Exception('Levels manager not initialized')
             
-            levels = self.levels_manager.get_all_levels()
+            levels = None
+            since = payload.get('sinceVersion')
+            if since is not None:
+                levels = self.levels_manager.get_changed_levels(since)
+            delta = levels is not None
+            if not delta:
+                levels = self.levels_manager.get_all_levels()
             stats = self.levels_manager.get_progression_stats()
             
-            print(f"DEBUG: Loading levels - found {len(levels)} levels")
+            print(f"DEBUG: Loading levels - {'changed' if delta else 'found'} {len(levels)} levels")
             print(f"DEBUG: Stats: {stats}")
             
             response = {
                 'type': 'load_levels_response',
                 'payload': {
                     'levels': levels,
-                    'stats': stats
+                    'stats': stats,
+                    'delta': delta
                 }
             }
-            
-            # Ensure response is JSON serializable
-            response_json = json.dumps(response)
-            print(f"DEBUG: Response JSON length: {len(response_json)}")
-            self.messageReceived.emit(response_json)
+            return response
             
         except Exception as e:
             import traceback
@@ -246,7 +697,7 @@ class Bridge(QObject):
                     'message': f'Error loading levels: {str(e)}'
                 }
             }
-            self.messageReceived.emit(json.dumps(response))
+            return response
     
     def _handle_get_level(self, payload):
         """Handle get specific level request"""
@@ -267,7 +718,7 @@ class Bridge(QObject):
                 'type': 'get_level_response',
                 'payload': level
             }
-            self.messageReceived.emit(json.dumps(response))
+            return response
         except Exception as e:
             import traceback
             print(f"ERROR in _handle_get_level: {e}")
@@ -278,7 +729,7 @@ class Bridge(QObject):
                     'message': f'Error getting level: {str(e)}'
                 }
             }
-            self.messageReceived.emit(json.dumps(response))
+            return response
     
     def _handle_complete_level(self, payload):
         """Handle level completion"""
@@ -303,7 +754,7 @@ class Bridge(QObject):
                 'type': 'complete_level_response',
                 'payload': result
             }
-            self.messageReceived.emit(json.dumps(response))
+            return response
         except Exception as e:
             import traceback
             print(f"ERROR in _handle_complete_level: {e}")
@@ -314,7 +765,7 @@ class Bridge(QObject):
                     'message': f'Error completing level: {str(e)}'
                 }
             }
-            self.messageReceived.emit(json.dumps(response))
+            return response
     
     def _handle_get_level_progress(self, payload):
         """Handle get level progression stats"""
@@ -328,7 +779,7 @@ class Bridge(QObject):
                 'type': 'get_level_progress_response',
                 'payload': stats
             }
-            self.messageReceived.emit(json.dumps(response))
+            return response
         except Exception as e:
             response = {
                 'type': 'error',
@@ -336,13 +787,13 @@ class Bridge(QObject):
                     'message': f'Error getting level progress: {str(e)}'
                 }
             }
-            self.messageReceived.emit(json.dumps(response))
+            return response
     
     @pyqtSlot()
     def testConnection(self):
         """Test connection from JavaScript"""
         tooltip("Bridge connection successful!")
-        self.messageReceived.emit(json.dumps({
+        self.messageReceived.emit(json_codec.dumps({
             'type': 'connection_test',
             'payload': {'status': 'success'}
         }))
@@ -362,11 +813,41 @@ class Bridge(QObject):
             # Ensure directory exists
             os.makedirs(os.path.dirname(settings_file), exist_ok=True)
             
-            # Save settings to JSON file
-            with open(settings_file, 'w', encoding='utf-8') as f:
-                json.dump(settings_data, f, indent=2, ensure_ascii=False)
+            # Merge into the saved settings: the page only sends the keys it shows,
+            # so keys such as flushInterval or attemptsBackend must survive
+            settings = {}
+            if os.path.exists(settings_file):
+                try:
+                    with open(settings_file, 'r', encoding='utf-8') as f:
+                        settings = json.load(f)
+                except Exception as e:
+                    print(f"Error reading existing settings, replacing them: {e}")
+                if not isinstance(settings, dict):
+                    settings = {}
+            settings.update(settings_data)
+            
+            # Save settings through a temp file: load_settings runs on the worker
+            # pool and must never read a half-written file
+            temp_file = f"{settings_file}.tmp"
+            try:
+                with open(temp_file, 'w', encoding='utf-8') as f:
+                    json.dump(settings, f, indent=2, ensure_ascii=False)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_file, settings_file)
+            except Exception:
+                if os.path.exists(temp_file):
+                    try:
+                        os.remove(temp_file)
+                    except OSError:
+                        pass
+                raise
             
             print(f"DEBUG: Settings saved to {settings_file}")
+
+            # Move attempts between the log and SQLite if the storage choice changed
+            if self.attempts_manager and 'attemptsBackend' in settings_data:
+                self.attempts_manager.set_backend(settings_data.get('attemptsBackend'))
             
             response = {
                 'type': 'save_settings_response',
@@ -375,7 +856,7 @@ class Bridge(QObject):
                     'message': 'Settings saved successfully'
                 }
             }
-            self.messageReceived.emit(json.dumps(response))
+            return response
         except Exception as e:
             import traceback
             print(f"ERROR in _handle_save_settings: {e}")
@@ -386,7 +867,7 @@ class Bridge(QObject):
                     'message': f'Error saving settings: {str(e)}'
                 }
             }
-            self.messageReceived.emit(json.dumps(response))
+            return response
     
     def _handle_load_settings(self, payload):
         """Handle load settings request"""
@@ -411,7 +892,7 @@ class Bridge(QObject):
                     'success': True
                 }
             }
-            self.messageReceived.emit(json.dumps(response))
+            return response
         except Exception as e:
             import traceback
             print(f"ERROR in _handle_load_settings: {e}")
@@ -422,10 +903,19 @@ class Bridge(QObject):
                     'message': f'Error loading settings: {str(e)}'
                 }
             }
-            self.messageReceived.emit(json.dumps(response))
+            return response
 
     @pyqtSlot(str)
     def export_data(self, payload_str=None):
+        """Export data slot; runs like an 'export_data' message"""
+        self.sendMessage(json.dumps({'type': 'export_data', 'payload': {}}))
+
+    @pyqtSlot(str)
+    def import_data(self, payload_str):
+        """Import data slot; runs like an 'import_data' message"""
+        self.sendMessage(json.dumps({'type': 'import_data', 'payload': json.loads(payload_str)}))
+
+    def _handle_export_data(self, payload):
         """Handle export data request"""
         try:
             addon_folder = os.path.dirname(__file__)
@@ -441,6 +931,10 @@ class Bridge(QObject):
                                 data_to_export[filename] = json.load(f)
                         except Exception as fe:
                             print(f"DEBUG: Could not read {filename}: {fe}")
+
+            # Attempts live in a segmented log now; export them in the classic single-file shape
+            if self.attempts_manager:
+                data_to_export["attempts.json"] = self.attempts_manager.load_attempts()
             
             response = {
                 'type': 'export_data_response',
@@ -449,22 +943,18 @@ class Bridge(QObject):
                     'success': True
                 }
             }
-            # Note: Using sendMessage for response consistency if needed, 
-            # but usually slots emit messageReceived signals
-            self.messageReceived.emit(json.dumps(response))
+            return response
         except Exception as e:
             print(f"ERROR in export_data: {e}")
             response = {
                 'type': 'error',
                 'payload': {'message': f'Export failed: {str(e)}'}
             }
-            self.messageReceived.emit(json.dumps(response))
+            return response
 
-    @pyqtSlot(str)
-    def import_data(self, payload_str):
+    def _handle_import_data(self, payload):
         """Handle import data request"""
         try:
-            payload = json.loads(payload_str)
             import_data = payload.get('data', {})
             
             addon_folder = os.path.dirname(__file__)
@@ -492,13 +982,13 @@ class Bridge(QObject):
                     'imported_files': success_files
                 }
             }
-            self.messageReceived.emit(json.dumps(response))
             # Optional: Refresh managers if needed, or user can restart
             tooltip("Data imported successfully. Please restart the addon to apply changes.")
+            return response
         except Exception as e:
             print(f"ERROR in import_data: {e}")
             response = {
                 'type': 'error',
                 'payload': {'message': f'Import failed: {str(e)}'}
             }
-            self.messageReceived.emit(json.dumps(response))
+            return response
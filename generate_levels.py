@@ -2,6 +2,8 @@ import json
 import os
 import random
 
+from level_shards import build_level_shards
+
 def generate_levels():
     base_path = r"d:\coding\Math drill 2\data\static\level_data.json"
     
@@ -98,6 +100,9 @@ def generate_levels():
         json.dump(data, f, indent=2, ensure_ascii=False)
     
     print(f"Generated {len(new_levels)} levels. Total: {len(data['levels'])}")
+    
+    # Keep the summary index and shards LevelsManager loads in step
+    build_level_shards(os.path.dirname(base_path))
 
 if __name__ == "__main__":
     generate_levels()
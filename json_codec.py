@@ -0,0 +1,49 @@
+import json
+from typing import Any
+
+# Optional fast encoders; the stdlib json module is always the fallback
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+if orjson is not None:
+    BACKEND = "orjson"
+elif ujson is not None:
+    BACKEND = "ujson"
+else:
+    BACKEND = "json"
+
+
+def dumps(obj: Any) -> str:
+    """Serialize to a JSON string with the fastest available encoder.
+
+    Values a fast encoder rejects (unusual types, out-of-range numbers) are
+    serialized by the stdlib instead.
+    """
+    if orjson is not None:
+        try:
+            # Non-string keys (e.g. digit counts) become strings, as with the stdlib
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+        except TypeError:
+            pass
+    elif ujson is not None:
+        try:
+            return ujson.dumps(obj, ensure_ascii=False)
+        except (TypeError, ValueError, OverflowError):
+            pass
+    return json.dumps(obj)
+
+
+def loads(text: str) -> Any:
+    """Parse a JSON string with the fastest available decoder."""
+    if orjson is not None:
+        return orjson.loads(text)
+    if ujson is not None:
+        return ujson.loads(text)
+    return json.loads(text)
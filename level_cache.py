@@ -0,0 +1,89 @@
+import hashlib
+import marshal
+import os
+import sys
+from typing import Any, List, Optional
+
+# Bump when the layout of cached payloads changes
+CACHE_FORMAT = 2
+
+# marshal output is only guaranteed to load on the Python that wrote it
+_RUNTIME = (CACHE_FORMAT, marshal.version, sys.version_info[:2])
+
+
+def _file_hash(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _source_keys(sources: List[str]) -> List[Optional[list]]:
+    """[size, mtime_ns, sha256] of each source file, None for missing ones."""
+    keys = []
+    for path in sources:
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            keys.append(None)
+            continue
+        keys.append([st.st_size, st.st_mtime_ns, _file_hash(path)])
+    return keys
+
+
+def load(cache_path: str, sources: List[str]) -> Optional[Any]:
+    """
+    Return the payload cached for `sources`, or None if there is no cache or
+    any source changed since it was written.
+
+    Sources are compared by size and mtime; when only the mtime differs (a
+    checkout or copy touched the file) the content hash decides, and a match
+    refreshes the recorded mtimes.
+    """
+    try:
+        with open(cache_path, "rb") as f:
+            runtime, keys, payload = marshal.loads(f.read())
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"Ignoring unreadable level cache: {e}")
+        return None
+
+    if runtime != _RUNTIME or len(keys) != len(sources):
+        return None
+
+    touched = False
+    for path, key in zip(sources, keys):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            if key is not None:
+                return None
+            continue
+        if key is None or st.st_size != key[0]:
+            return None
+        if st.st_mtime_ns != key[1]:
+            if _file_hash(path) != key[2]:
+                return None
+            touched = True
+
+    if touched:
+        save(cache_path, sources, payload)
+    return payload
+
+
+def save(cache_path: str, sources: List[str], payload: Any) -> bool:
+    """Write `payload` (plain JSON-like data) to the cache, keyed on the current `sources`."""
+    temp_path = f"{cache_path}.tmp"
+    try:
+        data = marshal.dumps((_RUNTIME, _source_keys(sources), payload))
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, cache_path)
+        return True
+    except Exception as e:
+        print(f"Failed to write level cache {cache_path}: {e}")
+        if os.path.exists(temp_path):
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+        return False
@@ -0,0 +1,119 @@
+import hashlib
+import json
+import os
+import sys
+from typing import Dict, List, Optional
+
+# Generated from data/static/level_data.json by build_level_shards(); the full
+# file stays the source of truth and the fallback when these are missing or stale
+SHARD_DIR = "levels"
+INDEX_FILE = "index.json"
+DEFAULT_SHARD_SIZE = 50
+
+# Level fields kept in the eagerly loaded summary index: what the level map,
+# unlock logic and search need. Everything else lives only in the shards.
+SUMMARY_FIELDS = ("id", "name", "description", "operation", "digits", "difficulty", "unlockCondition")
+# Requirements trimmed to the goal shown on level cards
+SUMMARY_REQUIREMENTS = ("minCorrect", "totalQuestions")
+
+
+def shard_file_name(shard: int) -> str:
+    return f"shard_{shard:03d}.json"
+
+
+def index_path(static_dir: str) -> str:
+    return os.path.join(static_dir, SHARD_DIR, INDEX_FILE)
+
+
+def file_hash(path: str) -> str:
+    """SHA-256 of a file's contents."""
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def summarize_level(level: Dict) -> Dict:
+    """Compact summary of a full level definition."""
+    summary = {field: level[field] for field in SUMMARY_FIELDS if field in level}
+    requirements = level.get("requirements")
+    if isinstance(requirements, dict):
+        summary["requirements"] = {key: requirements[key] for key in SUMMARY_REQUIREMENTS if key in requirements}
+    return summary
+
+
+def load_index(static_dir: str) -> Optional[Dict]:
+    """
+    Load the summary index, or None if it is missing, unreadable or older than
+    level_data.json (its recorded source size or content hash no longer matches).
+    """
+    source_path = os.path.join(static_dir, "level_data.json")
+    try:
+        with open(index_path(static_dir), "r", encoding="utf-8") as f:
+            index = json.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"Failed to load level index: {e}")
+        return None
+
+    if os.path.exists(source_path) and (os.path.getsize(source_path) != index.get("sourceSize")
+                                        or file_hash(source_path) != index.get("sourceHash")):
+        print("Level index is out of date with level_data.json; run level_shards.py to rebuild it")
+        return None
+    return index
+
+
+def load_shard(static_dir: str, shard: int, expected_hash: Optional[str] = None) -> List[Dict]:
+    """
+    Load the full level definitions of one shard. Raises ValueError if its
+    contents do not match `expected_hash` (the hash recorded in the index).
+    """
+    with open(os.path.join(static_dir, SHARD_DIR, shard_file_name(shard)), "rb") as f:
+        data = f.read()
+    if expected_hash is not None and hashlib.sha256(data).hexdigest() != expected_hash:
+        raise ValueError(f"{shard_file_name(shard)} does not match the level index")
+    return json.loads(data.decode("utf-8")).get("levels", [])
+
+
+def build_level_shards(static_dir: str, shard_size: int = DEFAULT_SHARD_SIZE) -> Dict:
+    """
+    Split level_data.json into the summary index and shards of `shard_size`
+    full definitions each, in file order. Returns the index.
+    """
+    source_path = os.path.join(static_dir, "level_data.json")
+    with open(source_path, "r", encoding="utf-8") as f:
+        levels = json.load(f).get("levels", [])
+
+    shard_dir = os.path.join(static_dir, SHARD_DIR)
+    os.makedirs(shard_dir, exist_ok=True)
+    for name in os.listdir(shard_dir):
+        if name.startswith("shard_") and name.endswith(".json"):
+            os.remove(os.path.join(shard_dir, name))
+
+    shard_count = (len(levels) + shard_size - 1) // shard_size
+    shard_hashes = []
+    for shard in range(shard_count):
+        chunk = levels[shard * shard_size:(shard + 1) * shard_size]
+        data = json.dumps({"levels": chunk}, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        with open(os.path.join(shard_dir, shard_file_name(shard)), "wb") as f:
+            f.write(data)
+        shard_hashes.append(hashlib.sha256(data).hexdigest())
+
+    # Levels are found in shard position // shardSize, by their position in "levels"
+    index = {
+        "sourceSize": os.path.getsize(source_path),
+        "sourceHash": file_hash(source_path),
+        "shardSize": shard_size,
+        "shardCount": shard_count,
+        "shardHashes": shard_hashes,
+        "levels": [summarize_level(level) for level in levels]
+    }
+    with open(index_path(static_dir), "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, separators=(",", ":"))
+
+    print(f"Wrote level index and {shard_count} shards for {len(levels)} levels to {shard_dir}")
+    return index
+
+
+if __name__ == "__main__":
+    default_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "static")
+    build_level_shards(sys.argv[1] if len(sys.argv) > 1 else default_dir)
@@ -2,12 +2,102 @@ import json
 import os
 import shutil
 import logging
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_right
 from datetime import datetime
-from typing import Dict, List, Optional, Any, Union
+from typing import Dict, List, Optional, Any, Set, Union
+
+from . import level_cache
+from . import level_shards
+from .write_behind import WriteBehind
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+
+class UnlockCondition(ABC):
+    """A level's parsed unlockCondition string."""
+
+    @abstractmethod
+    def is_met(self, total_stars: int, completions: Dict[int, Dict]) -> bool:
+        """Whether the level is unlocked given the total stars and the completions by levelId."""
+
+
+class AlwaysUnlocked(UnlockCondition):
+    """unlockCondition 'none'."""
+
+    def is_met(self, total_stars: int, completions: Dict[int, Dict]) -> bool:
+        return True
+
+
+class NeverUnlocked(UnlockCondition):
+    """An unlockCondition that could not be parsed."""
+
+    def is_met(self, total_stars: int, completions: Dict[int, Dict]) -> bool:
+        return False
+
+
+class TotalStarsUnlock(UnlockCondition):
+    """total_stars_N: at least N stars earned across all levels."""
+
+    def __init__(self, required: int):
+        self.required = required
+
+    def is_met(self, total_stars: int, completions: Dict[int, Dict]) -> bool:
+        return total_stars >= self.required
+
+
+class LevelStarsUnlock(UnlockCondition):
+    """complete_level_X[_total_stars_Y]: level X completed with at least Y stars (default 1)."""
+
+    def __init__(self, level_id: int, required: int):
+        self.level_id = level_id
+        self.required = required
+
+    def is_met(self, total_stars: int, completions: Dict[int, Dict]) -> bool:
+        completion = completions.get(self.level_id)
+        return bool(completion) and completion.get('starsEarned', 0) >= self.required
+
+
+def compile_unlock_condition(condition: str) -> UnlockCondition:
+    """Parse an unlockCondition string once into a condition object."""
+    if condition == 'none':
+        return AlwaysUnlocked()
+
+    # Optimization: Most common case first
+    if condition.startswith('total_stars_'):
+        try:
+            return TotalStarsUnlock(int(condition.split('_')[2]))
+        except (IndexError, ValueError):
+            pass
+
+    # Legacy support: complete_level_X
+    if condition.startswith('complete_level_'):
+        try:
+            parts = condition.split('_')
+            # parts: ['complete', 'level', 'ID', 'total', 'stars', 'COUNT']
+            req_id = int(parts[2])
+
+            # Check for star count in various possible positions
+            req_stars = 1
+            if 'stars' in parts:
+                stars_idx = parts.index('stars')
+                if len(parts) > stars_idx + 1:
+                    req_stars = int(parts[stars_idx + 1])
+            elif len(parts) > 3:
+                # Attempt to find any trailing integer as stars
+                try:
+                    req_stars = int(parts[-1])
+                except ValueError:
+                    pass
+            return LevelStarsUnlock(req_id, req_stars)
+        except (ValueError, IndexError):
+            pass
+
+    return NeverUnlocked()
+
+
 class LevelsManager:
     """
     Manages level data, progression, and completion tracking with robust data handling.
@@ -24,9 +114,46 @@ class LevelsManager:
         
         self.level_data_path = os.path.join(self.static_dir, "level_data.json")
         self.completion_path = os.path.join(self.user_dir, "level_completion.json")
+        self.settings_path = os.path.join(self.user_dir, "setting.json")
+        # Precompiled copy of the static level table, see level_cache
+        self.level_cache_path = os.path.join(self.user_dir, "level_cache.bin")
+        
+        # Completion saves are written by a background thread, newest snapshot wins
+        self.writer = WriteBehind.from_settings("MathDrillLevelsWriter", self.settings_path)
         
+        # Level summaries (see level_shards.SUMMARY_FIELDS); full definitions
+        # are loaded a shard at a time when a level is played
         self.levels_data: List[Dict] = []
+        # levelId -> level summary, built once at load
+        self.levels_by_id: Dict[int, Dict] = {}
+        # levelId -> full level definition, for the shards loaded so far
+        self.level_details: Dict[int, Dict] = {}
+        self._positions: Dict[int, int] = {}
+        self._shard_size = 0
+        self._shard_hashes: List[str] = []
+        self._loaded_shards: Set[int] = set()
+        # Unlock dependency graph, built once at load: compiled conditions by
+        # levelId, total-star thresholds sorted for bisect, and the levels
+        # unlocked by stars on each level
+        self.unlock_conditions: Dict[int, UnlockCondition] = {}
+        self._threshold_stars: List[int] = []
+        self._threshold_ids: List[int] = []
+        self._dependents: Dict[int, List[int]] = {}
+        # Ids of the levels that are currently unlocked
+        self.unlocked_ids: Set[int] = set()
         self.completions: Dict[int, Dict] = {}
+        # Running totals over completions, kept current by _save_level_result
+        self.total_stars = 0
+        self.completed_count = 0
+        # Bumped whenever completions change (level definitions are static);
+        # seeded from the clock so it keeps increasing across sessions
+        self.version = time.time_ns() // 1000
+        # Changes before this version are not tracked per level
+        self.base_version = self.version
+        # Enriched level views by levelId, dropped when a level's completion or
+        # lock state changes, and the version each level last changed at
+        self._enriched: Dict[int, Dict] = {}
+        self.level_versions: Dict[int, int] = {}
         
         self._load_data()
 
@@ -36,19 +163,105 @@ class LevelsManager:
         self._load_user_completions()
 
     def _load_level_definitions(self) -> None:
-        """Load static level definitions."""
+        """
+        Load the level table from the precompiled cache, or parse it again if
+        level_data.json or the summary index changed since it was cached.
+        """
+        sources = [self.level_data_path, level_shards.index_path(self.static_dir)]
+        table = level_cache.load(self.level_cache_path, sources)
+        if table is None:
+            table = self._parse_level_table()
+            level_cache.save(self.level_cache_path, sources, table)
+        else:
+            print(f"Loaded {len(table['levels'])} levels from cache")
+        
+        self.levels_data = table['levels']
+        self._shard_size = table['shardSize']
+        self._shard_hashes = table['shardHashes']
+        self.level_details = {level['id']: level for level in table['details']}
+        self._loaded_shards = set()
+        self.levels_by_id = {level['id']: level for level in self.levels_data}
+        self._positions = {level['id']: position for position, level in enumerate(self.levels_data)}
+        self._build_unlock_graph()
+
+    def _parse_level_table(self) -> Dict[str, Any]:
+        """Parse the level summary index, or all of level_data.json if there is no usable index."""
+        index = level_shards.load_index(self.static_dir)
+        if index is not None:
+            levels = index.get("levels", [])
+            print(f"Loaded {len(levels)} level summaries")
+            shard_hashes = index.get("shardHashes")
+            if isinstance(shard_hashes, list) and len(shard_hashes) == index.get("shardCount"):
+                return {'levels': levels, 'shardSize': index.get("shardSize", 0),
+                        'shardHashes': shard_hashes, 'details': []}
+            print("Level index has no shard hashes; run level_shards.py to rebuild it")
+        
+        levels = self._read_level_data()
+        return {
+            'levels': [level_shards.summarize_level(level) for level in levels],
+            'shardSize': 0,
+            'shardHashes': [],
+            'details': levels
+        }
+
+    def _read_level_data(self) -> List[Dict]:
+        """Read every full level definition from level_data.json."""
         try:
             if os.path.exists(self.level_data_path):
                 with open(self.level_data_path, 'r', encoding='utf-8') as f:
                     data = json.load(f)
-                    self.levels_data = data.get("levels", [])
-                print(f"Loaded {len(self.levels_data)} levels")
+                levels = data.get("levels", [])
+                print(f"Loaded {len(levels)} levels")
             else:
                 print(f"Level data file missing: {self.level_data_path}")
-                self.levels_data = []
+                levels = []
         except Exception as e:
             print(f"Failed to load level data: {e}")
-            self.levels_data = []
+            levels = []
+        return levels
+
+    def _level_detail(self, level_id: int) -> Optional[Dict]:
+        """Full definition of a level, loading its shard on first use."""
+        detail = self.level_details.get(level_id)
+        position = self._positions.get(level_id)
+        if detail is not None or position is None or not self._shard_size:
+            return detail
+        
+        shard = position // self._shard_size
+        if shard not in self._loaded_shards:
+            try:
+                expected = self._shard_hashes[shard] if shard < len(self._shard_hashes) else None
+                if expected is None:
+                    raise ValueError("no hash recorded for it in the level index")
+                for level in level_shards.load_shard(self.static_dir, shard, expected):
+                    self.level_details[level['id']] = level
+                self._loaded_shards.add(shard)
+            except Exception as e:
+                print(f"Failed to load level shard {shard}: {e}")
+        
+        detail = self.level_details.get(level_id)
+        if detail is None:
+            # Broken or incomplete shard: fall back to the full file
+            self._shard_size = 0
+            self.level_details = {level['id']: level for level in self._read_level_data()}
+            detail = self.level_details.get(level_id)
+        return detail
+
+    def _build_unlock_graph(self) -> None:
+        """Compile unlock conditions and index which levels each completion can unlock."""
+        self.unlock_conditions = {}
+        thresholds = []
+        self._dependents = {}
+        for level in self.levels_data:
+            condition = compile_unlock_condition(level.get('unlockCondition', 'none'))
+            self.unlock_conditions[level['id']] = condition
+            if isinstance(condition, TotalStarsUnlock):
+                thresholds.append((condition.required, level['id']))
+            elif isinstance(condition, LevelStarsUnlock):
+                self._dependents.setdefault(condition.level_id, []).append(level['id'])
+        thresholds.sort()
+        self._threshold_stars = [stars for stars, _ in thresholds]
+        self._threshold_ids = [level_id for _, level_id in thresholds]
 
     def _load_user_completions(self) -> None:
         """Load user progress."""
@@ -64,6 +277,16 @@ class LevelsManager:
         except Exception as e:
             print(f"Failed to load completions: {e}")
             self.completions = {}
+        self._recount_completions()
+
+    def _recount_completions(self) -> None:
+        """Recompute the running star and completion totals from scratch."""
+        self.total_stars = sum(c.get('starsEarned', 0) for c in self.completions.values())
+        # Completed means at least 1 star (passed)
+        self.completed_count = sum(1 for c in self.completions.values() if c.get('starsEarned', 0) > 0)
+        self.unlocked_ids = {level['id'] for level in self.levels_data
+                             if self._check_unlock_condition(level, self.total_stars)}
+        self._enriched = {}
 
     def _atomic_write(self, data: Dict, path: str) -> bool:
         """
@@ -87,34 +310,71 @@ class LevelsManager:
                     pass
             return False
 
+    def data_version(self) -> str:
+        """Version tag that changes whenever level or progression results may change."""
+        return str(self.version)
+
     def save_completions(self) -> bool:
-        """Persist user completions to disk."""
+        """Queue user completions to be persisted by the background writer."""
+        # Copy the entries so later updates cannot race the writer thread
         data = {
             "lastUpdated": datetime.now().isoformat(),
-            "completions": list(self.completions.values())
+            "completions": [dict(entry) for entry in self.completions.values()]
         }
-        return self._atomic_write(data, self.completion_path)
+        self.writer.submit(self.completion_path, lambda: self._atomic_write(data, self.completion_path))
+        return True
+
+    def flush(self) -> None:
+        """Write any queued completion save to disk."""
+        self.writer.flush()
+
+    def close(self) -> None:
+        """Write any queued completion save and stop the background writer."""
+        self.writer.close()
 
     def get_all_levels(self) -> List[Dict]:
-        """Return all levels with their current unlock/completion status."""
-        result = []
-        # Calculate total stars once for unlock logic
-        total_stars = sum(c.get('starsEarned', 0) for c in self.completions.values())
-        
-        for level in self.levels_data:
-            level_info = self._enrich_level_data(level, total_stars)
-            result.append(level_info)
-        return result
+        """
+        Return all level summaries with their current unlock/completion status.
+        The level dicts are shared with the enriched-view cache; do not modify them.
+        """
+        return [self._enriched_level(level) for level in self.levels_data]
+
+    def get_changed_levels(self, since_version: Any) -> Optional[List[Dict]]:
+        """
+        Return the levels whose status changed after `since_version` (a value
+        of data_version()), or None if changes that old are not tracked and
+        the caller needs the full list from get_all_levels().
+        """
+        try:
+            since = int(since_version)
+        except (TypeError, ValueError):
+            return None
+        if since < self.base_version or since > self.version:
+            return None
+        return [self._enriched_level(level) for level in self.levels_data
+                if self.level_versions.get(level['id'], 0) > since]
 
     def get_level(self, level_id: int) -> Optional[Dict]:
-        """Get a specific level by ID."""
-        for level in self.levels_data:
-            if level['id'] == level_id:
-                total_stars = sum(c.get('starsEarned', 0) for c in self.completions.values())
-                return self._enrich_level_data(level, total_stars)
-        return None
+        """Get the full definition of a specific level by ID, with its status."""
+        level = self._level_detail(level_id)
+        if level is None:
+            return None
+        return self._enrich_level_data(level)
+
+    def _enriched_level(self, level: Dict) -> Dict:
+        """Cached _enrich_level_data() of a level."""
+        level_info = self._enriched.get(level['id'])
+        if level_info is None:
+            level_info = self._enrich_level_data(level)
+            self._enriched[level['id']] = level_info
+        return level_info
 
-    def _enrich_level_data(self, level: Dict, total_stars: int) -> Dict:
+    def _mark_changed(self, level_id: int) -> None:
+        """Drop a level's cached view and record that it changed at the current version."""
+        self._enriched.pop(level_id, None)
+        self.level_versions[level_id] = self.version
+
+    def _enrich_level_data(self, level: Dict) -> Dict:
         """Add dynamic status (locked, completed, stars) to static level data."""
         level_info = level.copy()
         level_id = level['id']
@@ -139,50 +399,38 @@ class LevelsManager:
             })
         
         # Lock status
-        level_info['isLocked'] = not self._check_unlock_condition(level, total_stars)
+        level_info['isLocked'] = level_id not in self.unlocked_ids
         return level_info
 
     def _check_unlock_condition(self, level: Dict, total_stars: int) -> bool:
         """Determine if a level is unlocked."""
-        condition = level.get('unlockCondition', 'none')
-        
-        if condition == 'none':
-            return True
-            
-        # Optimization: Most common case first
-        if condition.startswith('total_stars_'):
-            try:
-                required = int(condition.split('_')[2])
-                return total_stars >= required
-            except (IndexError, ValueError):
-                pass
-                
-        # Legacy support: complete_level_X
-        if condition.startswith('complete_level_'):
-            try:
-                parts = condition.split('_')
-                # parts: ['complete', 'level', 'ID', 'total', 'stars', 'COUNT']
-                req_id = int(parts[2])
-                
-                # Check for star count in various possible positions
-                req_stars = 1
-                if 'stars' in parts:
-                    stars_idx = parts.index('stars')
-                    if len(parts) > stars_idx + 1:
-                        req_stars = int(parts[stars_idx + 1])
-                elif len(parts) > 3:
-                     # Attempt to find any trailing integer as stars
-                     try:
-                         req_stars = int(parts[-1])
-                     except ValueError:
-                         pass
-
-                prev_comp = self.completions.get(req_id)
-                return prev_comp and prev_comp.get('starsEarned', 0) >= req_stars
-            except (ValueError, IndexError):
-                pass
+        condition = self.unlock_conditions.get(level['id'])
+        if condition is None:
+            condition = compile_unlock_condition(level.get('unlockCondition', 'none'))
+        return condition.is_met(total_stars, self.completions)
 
-        return False
+    def _update_unlocks(self, level_id: int, old_total_stars: int) -> List[int]:
+        """
+        Re-check only the levels a change to level_id's completion can affect:
+        star thresholds between the old and new totals, and levels unlocked by
+        stars on level_id itself. Returns the ids that became unlocked.
+        """
+        low, high = sorted((old_total_stars, self.total_stars))
+        candidates = self._threshold_ids[bisect_right(self._threshold_stars, low):
+                                         bisect_right(self._threshold_stars, high)]
+        candidates += self._dependents.get(level_id, [])
+        
+        newly_unlocked = []
+        for candidate_id in candidates:
+            if self._check_unlock_condition(self.levels_by_id[candidate_id], self.total_stars):
+                if candidate_id not in self.unlocked_ids:
+                    self.unlocked_ids.add(candidate_id)
+                    self._mark_changed(candidate_id)
+                    newly_unlocked.append(candidate_id)
+            elif candidate_id in self.unlocked_ids:
+                self.unlocked_ids.discard(candidate_id)
+                self._mark_changed(candidate_id)
+        return sorted(newly_unlocked)
 
     def complete_level(self, level_id: int, correct_answers: int, 
                        total_questions: int, time_taken: float) -> Dict[str, Any]:
@@ -201,8 +449,9 @@ class LevelsManager:
         # 2. Determine if we should save (Best Record or First Fail)
         should_save, is_new_record = self._should_save_result(level_id, stats)
         
+        newly_unlocked = []
         if should_save:
-            self._save_level_result(level_id, stats, is_new_record)
+            newly_unlocked = self._save_level_result(level_id, stats, is_new_record)
 
         return {
             'success': stats['passed_requirements'],
@@ -212,7 +461,8 @@ class LevelsManager:
             'timeTaken': time_taken,
             'isNewRecord': is_new_record,
             'levelName': level['name'],
-            'nextLevelId': level.get('rewards', {}).get('unlocksLevel')
+            'nextLevelId': level.get('rewards', {}).get('unlocksLevel'),
+            'newlyUnlocked': newly_unlocked
         }
 
     def _calculate_stats(self, level: Dict, correct: int, total: int, time: float) -> Dict:
@@ -287,8 +537,8 @@ class LevelsManager:
         
         return is_better, is_better
 
-    def _save_level_result(self, level_id: int, stats: Dict, is_new_record: bool) -> None:
-        """Create completion entry and save to disk."""
+    def _save_level_result(self, level_id: int, stats: Dict, is_new_record: bool) -> List[int]:
+        """Create completion entry and save to disk. Returns the ids of newly unlocked levels."""
         entry = {
             'levelId': level_id,
             'starsEarned': stats['stars'],
@@ -299,20 +549,26 @@ class LevelsManager:
             'completionDate': datetime.now().isoformat(),
             'isNewRecord': is_new_record
         }
+        old_stars = self.completions.get(level_id, {}).get('starsEarned', 0)
+        old_total_stars = self.total_stars
+        self.total_stars += entry['starsEarned'] - old_stars
+        self.completed_count += (entry['starsEarned'] > 0) - (old_stars > 0)
         self.completions[level_id] = entry
+        self.version += 1
+        self._mark_changed(level_id)
+        newly_unlocked = self._update_unlocks(level_id, old_total_stars)
         self.save_completions()
+        return newly_unlocked
 
     def get_progression_stats(self) -> Dict[str, Any]:
         """Get summary stats for dashboard."""
         total_levels = len(self.levels_data)
-        # Completed means at least 1 star (passed)
-        completed_count = len([c for c in self.completions.values() if c.get('starsEarned', 0) > 0])
-        total_stars = sum(c.get('starsEarned', 0) for c in self.completions.values())
+        completed_count = self.completed_count
         
         return {
             'totalLevels': total_levels,
             'completedLevels': completed_count,
-            'totalStars': total_stars,
+            'totalStars': self.total_stars,
             'maxPossibleStars': total_levels * 3,
             'progressPercentage': round((completed_count / total_levels * 100) if total_levels > 0 else 0)
         }
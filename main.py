@@ -59,7 +59,20 @@ class AddonDialog(QDialog):
         # Add F12 shortcut for developer tools
         self.f12_shortcut = QShortcut(QKeySequence("F12"), self)
         self.f12_shortcut.activated.connect(self.toggle_inspector)
+
+        # Persist everything saved during the session when the dialog closes
+        self.finished.connect(self.on_finished)
         
+    def on_finished(self, result):
+        """Flush queued saves, checkpoint attempts written during this session and release the managers"""
+        # Let in-flight bridge handlers finish before touching the managers here
+        self.bridge.shutdown()
+        self.attempts_manager.checkpoint()
+        self.levels_manager.flush()
+        # Each dialog creates its own managers; stop their writer threads and the database
+        self.attempts_manager.close()
+        self.levels_manager.close()
+
     def toggle_inspector(self):
         """Toggle the web inspector in a separate window"""
         if not hasattr(self, "inspector"):
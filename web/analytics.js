@@ -5,6 +5,8 @@ class AnalyticsManager {
         this.attempts = [];
         this.charts = {};
         this.currentRange = 7;
+        // True once statistics come from the Python backend instead of localStorage
+        this.usingBackend = false;
 
         this.initializeEventListeners();
         this.loadStatistics();
@@ -27,7 +29,11 @@ class AnalyticsManager {
             // Re-render chart
             const days = parseInt(btn.dataset.range);
             this.currentRange = days;
-            this.createDailyProgressChart(this.attempts, days);
+            if (this.usingBackend) {
+                this.requestChartData();
+            } else {
+                this.createDailyProgressChart(this.attempts, days);
+            }
         });
         // Back button handled by inline onclick in HTML or app.js
 
@@ -41,18 +47,54 @@ class AnalyticsManager {
     loadStatistics() {
         // Try to get statistics from Python backend first
         if (typeof pybridge !== 'undefined' && pybridge) {
-            const message = JSON.stringify({
-                type: 'get_statistics',
-                payload: {}
+            this.usingBackend = true;
+            // Statistics and chart series arrive in one round trip; unchanged
+            // results are served from the copies kept by the previous visit
+            bridgeBatch([
+                { type: 'get_statistics', payload: {} },
+                this.chartDataRequest()
+            ], { persist: true }).then((responses) => {
+                responses.forEach((response) => this.handleBackendData(response));
+            }).catch((e) => {
+                console.warn('Could not load statistics from backend:', e);
+                this.loadFromLocalStorage();
             });
-            pybridge.sendMessage(message);
         } else {
             // Fallback to localStorage
             this.loadFromLocalStorage();
         }
     }
 
+    // Chart series are aggregated in Python; only chart-sized data comes back
+    chartDataRequest() {
+        return {
+            type: 'get_chart_data',
+            payload: {
+                buckets: 10,
+                days: this.currentRange,
+                heatmapDays: 364,
+                recent: 10
+            }
+        };
+    }
+
+    requestChartData() {
+        if (typeof pybridge === 'undefined' || !pybridge) return;
+        pybridge.sendMessage(JSON.stringify(this.chartDataRequest()));
+    }
+
+    handleBackendData(data) {
+        if (data.type === 'statistics_response') {
+            this.displayStatisticsFromBackend(data.payload);
+        } else if (data.type === 'chart_data_response') {
+            this.displayChartData(data.payload);
+        } else if (data.type === 'error') {
+            console.error('Backend error:', data.payload.message);
+        }
+    }
+
     loadFromLocalStorage() {
+        this.usingBackend = false;
         const saved = localStorage.getItem('mathDrillAttempts');
         if (saved) {
             const data = JSON.parse(saved);
@@ -88,6 +130,9 @@ class AnalyticsManager {
         // Display charts
         this.displayCharts();
 
+        // Render Insights & Streaks (fallback path)
+        this.renderInsights(this.calculateStreaks(this.attempts), this.aggregateFromAttempts(this.groupByOperation()));
+
         // Render Activity Heatmap (fallback path)
         this.renderActivityHeatmap(this.attempts);
     }
@@ -140,30 +185,57 @@ class AnalyticsManager {
         // Display operation stats - backend now returns correct structure
         this.renderOperationStats(stats.byOperation || {});
 
-        // Update local attempts with backend data if available so we can use them for everything
-        if (stats.attempts && Array.isArray(stats.attempts)) {
-            this.attempts = stats.attempts;
-        }
-
         this.displayChartsFromAggregates(stats.byOperation || {});
+    }
 
-        // Render trend chart using the attempts we just received
-        this.createTrendChart(this.attempts);
+    // Render the series computed by the backend (get_chart_data)
+    displayChartData(data) {
+        if (data.trend) {
+            this.renderTrendChart(data.trend.labels, data.trend.accuracy);
+        }
 
         // Render Insights & Streaks
-        this.renderInsights(this.attempts, stats.byOperation || {});
+        this.renderInsights(data.streaks || { current: 0, best: 0 }, data.byOperation || {});
 
         // Render Recent Activity
-        this.renderRecentActivity(this.attempts);
+        this.renderRecentActivity(data.recentAttempts || []);
 
         // Render Activity Heatmap
-        this.renderActivityHeatmap(this.attempts);
+        this.renderHeatmapCounts(data.heatmap || {});
 
         // Render Daily Progress Chart
-        this.createDailyProgressChart(this.attempts, this.currentRange);
+        this.renderDailyProgressChart(data.dailyProgress || [], this.currentRange);
     }
 
     renderActivityHeatmap(attempts) {
+        // Process attempts into day map "YYYY-MM-DD" -> count
+        const counts = {};
+        attempts.forEach(a => {
+            let date;
+            const ts = a.timestamp || a.date;
+            if (!ts) return;
+
+            try {
+                if (typeof ts === 'number') {
+                    date = new Date(ts * 1000);
+                } else {
+                    date = new Date(ts);
+                }
+                if (isNaN(date.getTime())) return;
+            } catch (e) { return; }
+
+            const year = date.getFullYear();
+            const month = String(date.getMonth() + 1).padStart(2, '0');
+            const day = String(date.getDate()).padStart(2, '0');
+            const dayStr = `${year}-${month}-${day}`;
+            counts[dayStr] = (counts[dayStr] || 0) + 1;
+        });
+
+        this.renderHeatmapCounts(counts);
+    }
+
+    // counts: local date "YYYY-MM-DD" -> number of attempts
+    renderHeatmapCounts(counts) {
         const grid = document.getElementById('heatmapGrid');
         const monthsContainer = document.getElementById('heatmapMonths');
         if (!grid) return;
@@ -172,30 +244,7 @@ class AnalyticsManager {
         if (monthsContainer) monthsContainer.innerHTML = '';
 
         try {
-            // 1. Process attempts into day map "YYYY-MM-DD" -> count
-            const counts = {};
-            attempts.forEach(a => {
-                let date;
-                const ts = a.timestamp || a.date;
-                if (!ts) return;
-
-                try {
-                    if (typeof ts === 'number') {
-                        date = new Date(ts * 1000);
-                    } else {
-                        date = new Date(ts);
-                    }
-                    if (isNaN(date.getTime())) return;
-                } catch (e) { return; }
-
-                const year = date.getFullYear();
-                const month = String(date.getMonth() + 1).padStart(2, '0');
-                const day = String(date.getDate()).padStart(2, '0');
-                const dayStr = `${year}-${month}-${day}`;
-                counts[dayStr] = (counts[dayStr] || 0) + 1;
-            });
-
-            // 2. Generate last 364 days (52 weeks)
+            // Generate last 364 days (52 weeks)
             const today = new Date();
             today.setHours(0, 0, 0, 0);
 
@@ -259,9 +308,8 @@ class AnalyticsManager {
         }
     }
 
-    renderInsights(attempts, byOperation) {
-        // Calculate Streaks
-        const streaks = this.calculateStreaks(attempts);
+    renderInsights(streaks, byOperation) {
+        // Streaks are { current, best } in days
         document.getElementById('currentStreak').textContent = `${streaks.current} Day${streaks.current !== 1 ? 's' : ''}`;
         document.getElementById('bestStreak').textContent = `${streaks.best} Day${streaks.best !== 1 ? 's' : ''}`;
 
@@ -477,8 +525,8 @@ class AnalyticsManager {
     }
 
     displayChartsFromAggregates(byOperation) {
-        // Destroy existing charts
-        ['accuracy', 'attempts', 'time', 'trend', 'dailyProgress'].forEach(key => {
+        // Destroy existing per-operation charts (trend and daily progress are rendered separately)
+        ['accuracy', 'attempts', 'time'].forEach(key => {
             if (this.charts[key]) {
                 this.charts[key].destroy();
                 this.charts[key] = null;
@@ -634,14 +682,10 @@ class AnalyticsManager {
         }
     }
 
-    // Note: Trend chart requires raw attempts data which we might not have 
-    // if loading from backend get_statistics. We'll skip it if no local attempts.
+    // Trend from raw attempts (localStorage fallback); the backend sends the series via get_chart_data
     createTrendChart(attempts) {
         if (!attempts || attempts.length === 0) return;
 
-        const ctx = document.getElementById('trendChart');
-        if (!ctx) return;
-
         // Calculate rolling average or bins
         const windowSize = Math.max(5, Math.floor(attempts.length / 10));
         const dataPoints = [];
@@ -655,6 +699,17 @@ class AnalyticsManager {
             labels.push(`${i + 1}`);
         }
 
+        this.renderTrendChart(labels, dataPoints);
+    }
+
+    renderTrendChart(labels, dataPoints) {
+        const ctx = document.getElementById('trendChart');
+        if (!ctx || !labels || labels.length === 0) return;
+
+        if (this.charts.trend) {
+            this.charts.trend.destroy();
+        }
+
         this.charts.trend = new Chart(ctx, {
             type: 'line',
             data: {
@@ -680,9 +735,6 @@ class AnalyticsManager {
     createDailyProgressChart(attempts, days = 7) {
         if (!attempts || attempts.length === 0) return;
 
-        const ctx = document.getElementById('dailyProgressChart');
-        if (!ctx) return;
-
         // Process attempts into day maps "YYYY-MM-DD" -> count/correct
         const counts = {};
         const correctCounts = {};
@@ -715,10 +767,8 @@ class AnalyticsManager {
             }
         });
 
-        // Generate date labels based on range
-        const labels = [];
-        const totalData = [];
-        const correctData = [];
+        // Last `days` local dates, oldest first
+        const progress = [];
         const today = new Date();
         today.setHours(0, 0, 0, 0);
 
@@ -726,6 +776,30 @@ class AnalyticsManager {
             const d = new Date(today);
             d.setDate(today.getDate() - i);
             const dayStr = getLocalDayStr(d);
+            progress.push({
+                date: dayStr,
+                attempts: counts[dayStr] || 0,
+                correct: correctCounts[dayStr] || 0
+            });
+        }
+
+        this.renderDailyProgressChart(progress, days);
+    }
+
+    // progress: [{ date: "YYYY-MM-DD", attempts, correct }], oldest first
+    renderDailyProgressChart(progress, days = 7) {
+        const ctx = document.getElementById('dailyProgressChart');
+        if (!ctx) return;
+
+        // Generate date labels based on range
+        const labels = [];
+        const totalData = [];
+        const correctData = [];
+
+        progress.forEach((p, index) => {
+            const i = progress.length - 1 - index;
+            const [year, month, day] = p.date.split('-').map(Number);
+            const d = new Date(year, month - 1, day);
 
             let label;
             if (days <= 14) {
@@ -748,9 +822,9 @@ class AnalyticsManager {
             }
 
             labels.push(label);
-            totalData.push(counts[dayStr] || 0);
-            correctData.push(correctCounts[dayStr] || 0);
-        }
+            totalData.push(p.attempts);
+            correctData.push(p.correct);
+        });
 
         if (this.charts.dailyProgress) {
             this.charts.dailyProgress.destroy();
@@ -832,17 +906,44 @@ class AnalyticsManager {
 
             if (!format) return; // User cancelled
 
-            if (format.toLowerCase() === 'csv') {
-                this.exportCSV();
-            } else {
-                this.exportJSON();
+            // The backend no longer ships raw attempts with the statistics; fetch them for the export.
+            // The full history can be large, so it is streamed in frames.
+            if (this.usingBackend && typeof pybridge !== 'undefined' && pybridge) {
+                const button = document.getElementById('exportBtn');
+                const label = button ? button.textContent : '';
+                bridgeRequest('load_attempts', {}, {
+                    stream: true,
+                    timeoutMs: 60000,
+                    onProgress: (chars) => {
+                        if (button) button.textContent = `Exporting... ${Math.round(chars / 1024)} KB`;
+                    }
+                }).then((data) => {
+                    this.attempts = data.payload.attempts || [];
+                    this.runExport(format);
+                }).catch((error) => {
+                    console.error('Export error:', error);
+                    alert('Failed to export data. Please try again.');
+                }).finally(() => {
+                    if (button) button.textContent = label;
+                });
+                return;
             }
+
+            this.runExport(format);
         } catch (error) {
             console.error('Export error:', error);
             alert('Failed to export data. Please try again.');
         }
     }
 
+    runExport(format) {
+        if (format.toLowerCase() === 'csv') {
+            this.exportCSV();
+        } else {
+            this.exportJSON();
+        }
+    }
+
     exportJSON() {
         const timestamp = new Date().toISOString().split('T')[0];
         const dataStr = JSON.stringify({
@@ -919,9 +1020,8 @@ class AnalyticsManager {
 window.handleBackendMessage = function (message) {
     try {
         const data = JSON.parse(message);
-        if (data.type === 'statistics_response' && window.analyticsManager) {
-            window.analyticsManager.displayStatisticsFromBackend(data.payload);
-        }
+        if (!window.analyticsManager) return;
+        window.analyticsManager.handleBackendData(data);
     } catch (e) {
         console.error('Bridge error:', e);
     }
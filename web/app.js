@@ -268,9 +268,206 @@ if (typeof qt !== 'undefined' && qt.webChannelTransport) {
     });
 }
 
+// Requests awaiting a reply, by request id (see bridgeRequest)
+const pendingRequests = new Map();
+let nextRequestId = 1;
+
+/**
+ * Send a message to Python and resolve with its reply.
+ * The reply is matched by the requestId Python echoes back, so any number of
+ * requests can be in flight at once. Error replies reject the promise.
+ *
+ * Options:
+ *   timeoutMs   - reject if no reply arrives in time (default 30 s)
+ *   coalesceKey - a newer request of the same type and key supersedes this one
+ *   signal      - an AbortSignal; aborting asks Python to drop the request
+ *   stream      - receive a large reply as a series of frames instead of one message
+ *   onProgress  - called with (charactersReceived, framesReceived) while streaming
+ *   ifVersion   - data version the caller already holds; Python answers with a
+ *                 small 'not_modified' reply if it is still current
+ * Superseded or aborted requests reject with an error whose `cancelled` is true.
+ */
+function bridgeRequest(type, payload = {}, options = {}) {
+    const { timeoutMs = 30000, coalesceKey, signal, stream = false, onProgress, ifVersion } = options;
+    return new Promise((resolve, reject) => {
+        if (!isConnected || !pybridge) {
+            reject(new Error('Python bridge not connected'));
+            return;
+        }
+        const requestId = `req-${nextRequestId++}`;
+        const pending = { resolve, reject, onProgress, chunks: [], nextSeq: 0, received: 0, timer: null };
+        // Re-armed on every stream frame, so only a stalled reply times out
+        pending.arm = () => {
+            clearTimeout(pending.timer);
+            pending.timer = setTimeout(() => {
+                pendingRequests.delete(requestId);
+                reject(new Error(`No reply to ${type} within ${timeoutMs} ms`));
+            }, timeoutMs);
+        };
+        pending.arm();
+        pendingRequests.set(requestId, pending);
+
+        const message = { type, payload, requestId };
+        if (coalesceKey !== undefined) message.coalesceKey = coalesceKey;
+        if (stream) message.stream = true;
+        if (ifVersion !== undefined) message.ifVersion = ifVersion;
+        pybridge.sendMessage(JSON.stringify(message));
+
+        if (signal) {
+            const cancel = () => pybridge.sendMessage(JSON.stringify({ type: 'cancel', payload: { requestId } }));
+            if (signal.aborted) cancel();
+            else signal.addEventListener('abort', cancel, { once: true });
+        }
+    });
+}
+window.bridgeRequest = bridgeRequest;
+
+// Last versioned reply per request, by cache key (see cachedBridgeRequest)
+const versionedReplies = new Map();
+
+function versionedReplyKey(type, payload) {
+    return `bridgeCache:${type}:${JSON.stringify(payload)}`;
+}
+
+function getVersionedReply(key, persist) {
+    if (versionedReplies.has(key)) return versionedReplies.get(key);
+    if (!persist) return null;
+    try {
+        const stored = JSON.parse(localStorage.getItem(key));
+        if (stored && stored.version !== undefined) {
+            versionedReplies.set(key, stored);
+            return stored;
+        }
+    } catch (e) {
+        console.warn('Ignoring unreadable cached reply:', e);
+    }
+    return null;
+}
+
+function putVersionedReply(key, reply, persist) {
+    if (reply.version === undefined) return;
+    versionedReplies.set(key, reply);
+    if (!persist) return;
+    try {
+        localStorage.setItem(key, JSON.stringify(reply));
+    } catch (e) {
+        // Quota exceeded: the in-memory copy still avoids refetching this session
+        console.warn('Could not persist cached reply:', e);
+    }
+}
+
+// Swap a 'not_modified' reply for the cached copy it refers to and remember new versions
+function resolveVersionedReply(key, reply, persist) {
+    if (reply.type === 'not_modified') {
+        const cached = getVersionedReply(key, persist);
+        if (cached && cached.version === reply.version) return cached;
+        const error = new Error(`No cached ${reply.requestType} reply for version ${reply.version}`);
+        error.missingCache = true;
+        throw error;
+    }
+    putVersionedReply(key, reply, persist);
+    return reply;
+}
+
+/**
+ * bridgeRequest() for levels, progress and statistics requests, whose replies
+ * carry a data version. The version of the last reply is sent along, and an
+ * unchanged result is served from the cached copy instead of being resent.
+ * With persist set the copy is also kept in localStorage across page loads.
+ */
+async function cachedBridgeRequest(type, payload = {}, options = {}) {
+    const { persist = false, ...requestOptions } = options;
+    const key = versionedReplyKey(type, payload);
+    const cached = getVersionedReply(key, persist);
+    if (cached) requestOptions.ifVersion = cached.version;
+    try {
+        return resolveVersionedReply(key, await bridgeRequest(type, payload, requestOptions), persist);
+    } catch (e) {
+        if (!e.missingCache) throw e;
+        // The cached copy went missing between send and reply; ask again without it
+        versionedReplies.delete(key);
+        return bridgeRequest(type, payload, { ...requestOptions, ifVersion: undefined });
+    }
+}
+window.cachedBridgeRequest = cachedBridgeRequest;
+
+/**
+ * Send several requests as one 'batch' message and resolve with their replies
+ * in order. Versioned sub-requests are conditional, as with cachedBridgeRequest().
+ */
+async function bridgeBatch(requests, options = {}) {
+    const { persist = false, ...requestOptions } = options;
+    const keys = requests.map(request => versionedReplyKey(request.type, request.payload || {}));
+    const conditional = requests.map((request, i) => {
+        const cached = getVersionedReply(keys[i], persist);
+        return cached ? { ...request, ifVersion: cached.version } : request;
+    });
+    const reply = await bridgeRequest('batch', { requests: conditional }, requestOptions);
+    return (reply.payload?.responses || []).map((response, i) => {
+        try {
+            return resolveVersionedReply(keys[i], response, persist);
+        } catch (e) {
+            return { type: 'error', payload: { message: e.message } };
+        }
+    });
+}
+window.bridgeBatch = bridgeBatch;
+
+// Settle the pending request a reply belongs to; false if nobody is waiting for it
+function settleRequest(data) {
+    const pending = pendingRequests.get(data.requestId);
+    if (!pending) return false;
+
+    if (data.type === 'stream_chunk') {
+        if (data.seq !== pending.nextSeq) {
+            pendingRequests.delete(data.requestId);
+            clearTimeout(pending.timer);
+            pending.reject(new Error(`Stream frame ${data.seq} arrived, expected ${pending.nextSeq}`));
+            return true;
+        }
+        pending.chunks.push(data.data);
+        pending.nextSeq++;
+        pending.received += data.data.length;
+        pending.arm();
+        if (pending.onProgress) pending.onProgress(pending.received, pending.nextSeq);
+        return true;
+    }
+
+    pendingRequests.delete(data.requestId);
+    clearTimeout(pending.timer);
+    if (data.type === 'stream_end') {
+        if (data.frames !== pending.nextSeq) {
+            pending.reject(new Error(`Stream ended after ${pending.nextSeq} of ${data.frames} frames`));
+            return true;
+        }
+        // The frames are consecutive slices of the JSON text of the real reply
+        try {
+            data = JSON.parse(pending.chunks.join(''));
+        } catch (e) {
+            pending.reject(new Error(`Could not reassemble streamed reply: ${e.message}`));
+            return true;
+        } finally {
+            pending.chunks = null;
+        }
+    }
+    if (data.type === 'error') {
+        pending.reject(new Error(data.payload?.message || 'Request failed'));
+    } else if (data.type === 'cancelled') {
+        const error = new Error(data.payload?.message || 'Request cancelled');
+        error.cancelled = true;
+        pending.reject(error);
+    } else {
+        pending.resolve(data);
+    }
+    return true;
+}
+
 function handlePythonMessage(message) {
     try {
         const data = JSON.parse(message);
+        // Replies to bridgeRequest() go straight to their caller
+        if (data.requestId !== undefined && settleRequest(data)) return;
+
         const type = data.type;
         const payload = data.payload;
 
@@ -296,6 +493,9 @@ function handlePythonMessage(message) {
             case 'save_settings_response':
                 console.log(`✓ Settings saved to backend`);
                 break;
+            case 'cancelled':     // a superseded request; its newer replacement carries the result
+            case 'not_modified':  // answered from the caller's cached copy
+                break;
             default:
                 // Try to delegate to global handler if exists (e.g. for analytics)
                 if (typeof window.handleBackendMessage === 'function') {
@@ -8,6 +8,8 @@ class LevelsManager {
         this.filteredLevels = [];
         this.stats = {};
         this.bridge = null;
+        // Data version of the levels on screen, sent so unchanged data is not resent
+        this.version = undefined;
 
         // Filter state
         this.filters = {
@@ -22,6 +24,7 @@ class LevelsManager {
 
     init() {
         this.initializeEventListeners();
+        this.loadCachedLevels();
         this.setupBridge();
     }
 
@@ -100,23 +103,63 @@ class LevelsManager {
         initBridge();
     }
 
+    // Show the levels from the last visit straight away; loadLevels() confirms or replaces them
+    loadCachedLevels() {
+        try {
+            const cached = JSON.parse(localStorage.getItem('levelsCache'));
+            if (!cached || cached.version === undefined) return;
+            this.version = cached.version;
+            this.levels = cached.levels || [];
+            this.stats = cached.stats || {};
+            this.render();
+        } catch (e) {
+            console.warn('Ignoring unreadable levels cache:', e);
+        }
+    }
+
+    saveCachedLevels() {
+        try {
+            localStorage.setItem('levelsCache', JSON.stringify({
+                version: this.version,
+                levels: this.levels,
+                stats: this.stats
+            }));
+        } catch (e) {
+            console.warn('Could not cache levels:', e);
+        }
+    }
+
     loadLevels() {
         if (!this.bridge) return;
 
         console.log('🚀 Requesting levels...');
-        this.bridge.sendMessage(JSON.stringify({
+        const message = {
             type: 'load_levels',
             payload: {}
-        }));
+        };
+        if (this.version !== undefined) {
+            // Unchanged levels are not resent; changed ones arrive as a delta
+            message.ifVersion = this.version;
+            message.payload.sinceVersion = this.version;
+        }
+        this.bridge.sendMessage(JSON.stringify(message));
     }
 
     handlePythonResponse(responseStr) {
         try {
             const data = JSON.parse(responseStr);
             if (data.type === 'load_levels_response') {
-                this.levels = data.payload.levels || [];
+                if (data.payload.delta) {
+                    this.mergeLevels(data.payload.levels || []);
+                } else {
+                    this.levels = data.payload.levels || [];
+                }
                 this.stats = data.payload.stats || {};
+                this.version = data.version;
+                if (this.version !== undefined) this.saveCachedLevels();
                 this.render();
+            } else if (data.type === 'not_modified' && data.requestType === 'load_levels') {
+                console.log('✓ Levels unchanged since last visit');
             } else if (data.type === 'error') {
                 this.showError(data.payload.message);
             }
@@ -125,6 +168,12 @@ class LevelsManager {
         }
     }
 
+    // Replace the levels a delta reply says have changed
+    mergeLevels(changed) {
+        const byId = new Map(changed.map(level => [level.id, level]));
+        this.levels = this.levels.map(level => byId.get(level.id) || level);
+    }
+
     // --- Rendering ---
 
     render() {
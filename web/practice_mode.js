@@ -26,11 +26,23 @@ class PracticeMode {
         };
         this.isAdaptive = false;
         this.weaknesses = [];
+        this.syncCursor = null; // Python's high-water mark of synced attempts
+        this.syncInFlight = false;
+        this.syncQueued = false;
 
         this.initializeEventListeners();
         this.initializeKeyboardShortcuts();
         this.initializeSoundToggle();
         this.loadAttempts();
+        this.initializeSync();
+    }
+
+    initializeSync() {
+        if (typeof pybridge !== 'undefined' && pybridge) {
+            this.fetchSyncCursor();
+        } else {
+            window.addEventListener('pybridge-connected', () => this.fetchSyncCursor());
+        }
     }
 
     initializeEventListeners() {
@@ -208,27 +220,17 @@ class PracticeMode {
     async fetchWeaknesses() {
         if (typeof pybridge !== 'undefined' && pybridge) {
             try {
-                const message = JSON.stringify({
-                    type: 'get_weaknesses',
-                    payload: {
-                        operation: this.operation,
-                        digits: this.digits
-                    }
+                const data = await cachedBridgeRequest('get_weaknesses', {
+                    operation: this.operation,
+                    digits: this.digits
                 });
-
-                // Set up a one-time listener for the response
-                const handler = (msg) => {
-                    const data = JSON.parse(msg);
-                    if (data.type === 'get_weaknesses_response' && data.payload.success) {
-                        this.weaknesses = data.payload.weaknesses || [];
-                        console.log('Fetched weaknesses:', this.weaknesses);
-                        pybridge.messageReceived.disconnect(handler);
-                    }
-                };
-                pybridge.messageReceived.connect(handler);
-                pybridge.sendMessage(message);
+                if (data.payload.success) {
+                    this.weaknesses = data.payload.weaknesses || [];
+                    console.log('Fetched weaknesses:', this.weaknesses);
+                }
             } catch (e) {
-                console.warn('Could not fetch weaknesses:', e);
+                // get_weaknesses is latest-wins: a quicker operation/digits change superseded this one
+                if (!e.cancelled) console.warn('Could not fetch weaknesses:', e);
             }
         }
     }
@@ -834,18 +836,63 @@ class PracticeMode {
         };
         localStorage.setItem('mathDrillAttempts', JSON.stringify(attemptsData));
 
-        // Also save to Python backend if available
-        if (typeof pybridge !== 'undefined' && pybridge) {
-            try {
-                const message = JSON.stringify({
-                    type: 'save_attempts',
-                    payload: { attempts: attemptsData }
-                });
-                pybridge.sendMessage(message);
-                console.log('Attempts saved to Python backend');
-            } catch (e) {
-                console.warn('Could not save to Python backend:', e);
+        // Also sync new attempts to Python backend if available
+        this.syncAttempts();
+    }
+
+    async fetchSyncCursor() {
+        if (typeof pybridge === 'undefined' || !pybridge) return;
+        try {
+            const data = await bridgeRequest('get_sync_cursor');
+            if (data.payload.success) {
+                this.syncCursor = data.payload.cursor;
+                this.syncAttempts();
+            }
+        } catch (e) {
+            console.warn('Could not fetch sync cursor:', e);
+        }
+    }
+
+    async syncAttempts() {
+        if (typeof pybridge === 'undefined' || !pybridge) return;
+
+        // Without Python's high-water mark we would resend the whole history;
+        // wait for the cursor response, which triggers the sync itself
+        if (!this.syncCursor) return;
+
+        if (this.syncInFlight) {
+            this.syncQueued = true;
+            return;
+        }
+
+        const cursorMs = this.syncCursor.ms || 0;
+        const pending = this.attempts.filter(a => {
+            const ts = typeof a.timestamp === 'number' ? a.timestamp * 1000 : Date.parse(a.timestamp);
+            // Without a readable timestamp it can never fall behind the cursor,
+            // so it would be resent forever; count it as synced
+            if (Number.isNaN(ts)) return false;
+            return ts > cursorMs;
+        });
+        if (pending.length === 0) return;
+
+        this.syncInFlight = true;
+        try {
+            const data = await bridgeRequest('save_attempts', { attempts: { attempts: pending } });
+            if (data.payload.success && data.payload.cursor) {
+                this.syncCursor = data.payload.cursor;
             }
+            console.log(`Synced ${pending.length} new attempts to Python backend`);
+        } catch (e) {
+            // Error reply or no reply: the attempts stay past the cursor and go with the next sync
+            console.warn('Could not save to Python backend:', e);
+        } finally {
+            this.syncInFlight = false;
+        }
+
+        // Attempts answered while the previous batch was in flight
+        if (this.syncQueued) {
+            this.syncQueued = false;
+            this.syncAttempts();
         }
     }
 
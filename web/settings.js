@@ -11,7 +11,8 @@ const DEFAULT_SETTINGS = {
     showAccuracy: true,
     autoCheckAnswers: false,
     darkMode: true,
-    adaptiveDifficulty: false
+    adaptiveDifficulty: false,
+    attemptsBackend: 'log'
 };
 
 // Load settings from localStorage
@@ -97,6 +98,7 @@ document.addEventListener('DOMContentLoaded', function () {
     const accuracyDisplay = document.getElementById('accuracyDisplay');
     const autoCheck = document.getElementById('autoCheck');
     const adaptiveToggle = document.getElementById('adaptiveDifficultyToggle');
+    const sqliteToggle = document.getElementById('sqliteBackendToggle');
     const saveBtn = document.getElementById('saveSettingsBtn');
     const resetBtn = document.getElementById('resetBtn');
     const backBtn = document.getElementById('backBtn');
@@ -131,7 +133,8 @@ document.addEventListener('DOMContentLoaded', function () {
                 adaptiveDifficulty: adaptiveToggle?.checked ?? false,
                 problemsPerSession: settings.problemsPerSession || 10,
                 difficultyLevel: settings.difficultyLevel || 'medium',
-                darkMode: themeToggle?.checked ?? true
+                darkMode: themeToggle?.checked ?? true,
+                attemptsBackend: sqliteToggle?.checked ? 'sqlite' : 'log'
             };
 
             saveSettings(newSettings);
@@ -158,10 +161,23 @@ document.addEventListener('DOMContentLoaded', function () {
     if (exportBtn) {
         exportBtn.addEventListener('click', () => {
             if (window.pybridge) {
-                const message = { type: 'export_data', payload: {} };
-                window.pybridge.sendMessage(JSON.stringify(message));
                 exportBtn.disabled = true;
                 exportBtn.textContent = 'Exporting...';
+                // The backup holds the full attempt history, so it is streamed in frames
+                bridgeRequest('export_data', {}, {
+                    stream: true,
+                    timeoutMs: 60000,
+                    onProgress: (chars) => {
+                        exportBtn.textContent = `Exporting... ${Math.round(chars / 1024)} KB`;
+                    }
+                }).then((message) => {
+                    if (message.payload.success) downloadExport(message.payload.data);
+                }).catch((error) => {
+                    console.error('Export failed:', error);
+                }).finally(() => {
+                    exportBtn.disabled = false;
+                    exportBtn.textContent = 'Export';
+                });
             }
         });
     }
@@ -196,6 +212,20 @@ document.addEventListener('DOMContentLoaded', function () {
         });
     }
 
+    function downloadExport(data) {
+        const dataStr = JSON.stringify(data, null, 4);
+        const blob = new Blob([dataStr], { type: 'application/json' });
+        const url = URL.createObjectURL(blob);
+        const a = document.createElement('a');
+        a.href = url;
+        a.download = `math_drill_backup_${new Date().toISOString().split('T')[0]}.json`;
+        document.body.appendChild(a);
+        a.click();
+        document.body.removeChild(a);
+        URL.revokeObjectURL(url);
+        showSuccessMessage('Data exported successfully!');
+    }
+
     // Handle responses from Python
     window.handleBridgeMessage = function (messageStr) {
         try {
@@ -210,23 +240,6 @@ document.addEventListener('DOMContentLoaded', function () {
                     applySettings(backendSettings);
                     updateUI(backendSettings);
                 }
-            } else if (message.type === 'export_data_response' && message.payload.success) {
-                const dataStr = JSON.stringify(message.payload.data, null, 4);
-                const blob = new Blob([dataStr], { type: 'application/json' });
-                const url = URL.createObjectURL(blob);
-                const a = document.createElement('a');
-                a.href = url;
-                a.download = `math_drill_backup_${new Date().toISOString().split('T')[0]}.json`;
-                document.body.appendChild(a);
-                a.click();
-                document.body.removeChild(a);
-                URL.revokeObjectURL(url);
-
-                if (exportBtn) {
-                    exportBtn.disabled = false;
-                    exportBtn.textContent = 'Export';
-                }
-                showSuccessMessage('Data exported successfully!');
             } else if (message.type === 'import_data_response' && message.payload.success) {
                 if (importBtn) {
                     importBtn.disabled = false;
@@ -253,6 +266,7 @@ document.addEventListener('DOMContentLoaded', function () {
         const accuracyDisplay = document.getElementById('accuracyDisplay');
         const autoCheck = document.getElementById('autoCheck');
         const adaptiveToggle = document.getElementById('adaptiveDifficultyToggle');
+        const sqliteToggle = document.getElementById('sqliteBackendToggle');
 
         if (themeToggle) themeToggle.checked = settings.theme === 'dark' || settings.theme === 'auto';
         if (soundToggle) soundToggle.checked = settings.soundEnabled;
@@ -261,6 +275,7 @@ document.addEventListener('DOMContentLoaded', function () {
         if (accuracyDisplay) accuracyDisplay.checked = settings.showAccuracy;
         if (autoCheck) autoCheck.checked = settings.autoCheckAnswers;
         if (adaptiveToggle) adaptiveToggle.checked = settings.adaptiveDifficulty || false;
+        if (sqliteToggle) sqliteToggle.checked = settings.attemptsBackend === 'sqlite';
     }
 
 });
@@ -0,0 +1,129 @@
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+# Seconds a queued write may wait before the worker picks it up
+DEFAULT_FLUSH_INTERVAL = 2.0
+
+# Units of queued work (e.g. attempt records) that trigger an immediate flush
+DEFAULT_FLUSH_THRESHOLD = 200
+
+
+class WriteBehind:
+    """
+    Background writer that takes disk writes off the calling (GUI) thread.
+
+    Writes are queued under a key; queuing a key whose write has not started
+    yet replaces it, so rapid successive saves of the same file collapse into
+    a single write. A dedicated worker thread runs the queue once `interval`
+    seconds have passed since the first queued write, or straight away once
+    `threshold` units of work are waiting. `flush()` blocks until everything
+    queued so far has been written.
+    """
+
+    def __init__(self, name: str, interval: float = DEFAULT_FLUSH_INTERVAL,
+                 threshold: int = DEFAULT_FLUSH_THRESHOLD):
+        self.name = name
+        self.interval = max(0.0, float(interval))
+        self.threshold = max(1, int(threshold))
+
+        self._cond = threading.Condition()
+        # key -> write, in the order keys were first queued
+        self._queue: Dict[str, Callable[[], None]] = {}
+        self._weight = 0
+        self._since: Optional[float] = None
+        self._busy = False
+        self._flush_requested = False
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_settings(cls, name: str, settings_file: str) -> "WriteBehind":
+        """Create a writer using "flushInterval" (seconds) and "flushThreshold" from the user settings."""
+        interval, threshold = DEFAULT_FLUSH_INTERVAL, DEFAULT_FLUSH_THRESHOLD
+        try:
+            if os.path.exists(settings_file):
+                with open(settings_file, "r", encoding="utf-8") as f:
+                    settings = json.load(f)
+                interval = float(settings.get("flushInterval", interval))
+                threshold = int(settings.get("flushThreshold", threshold))
+        except Exception as e:
+            print(f"Error reading write-behind settings: {e}")
+        return cls(name, interval, threshold)
+
+    @property
+    def pending(self) -> bool:
+        """Whether any queued write has not finished yet."""
+        with self._cond:
+            return bool(self._queue) or self._busy
+
+    def submit(self, key: str, write: Callable[[], None], weight: int = 1) -> None:
+        """Queue `write` under `key`, replacing a still-waiting write for the same key."""
+        with self._cond:
+            if not self._closed:
+                self._queue[key] = write
+                self._weight += weight
+                if self._since is None:
+                    self._since = time.monotonic()
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                    self._thread.start()
+                self._cond.notify_all()
+                return
+
+        # After close() writes happen synchronously
+        write()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Write everything queued so far; returns False if `timeout` ran out first."""
+        with self._cond:
+            if not self._queue and not self._busy:
+                return True
+            self._flush_requested = True
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: not self._queue and not self._busy, timeout)
+
+    def close(self) -> None:
+        """Flush and stop the worker thread; later submits write synchronously."""
+        self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join()
+
+    def _due(self) -> bool:
+        if self._flush_requested or self._closed or self._weight >= self.threshold:
+            return True
+        return time.monotonic() - self._since >= self.interval
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not (self._queue and self._due()):
+                    if self._closed and not self._queue:
+                        return
+                    timeout = None
+                    if self._queue:
+                        timeout = max(0.0, self._since + self.interval - time.monotonic())
+                    self._cond.wait(timeout)
+                writes = list(self._queue.values())
+                self._queue.clear()
+                self._weight = 0
+                self._since = None
+                self._busy = True
+
+            for write in writes:
+                try:
+                    write()
+                except Exception as e:
+                    print(f"Error in background write ({self.name}): {e}")
+
+            with self._cond:
+                self._busy = False
+                if not self._queue:
+                    self._flush_requested = False
+                self._cond.notify_all()